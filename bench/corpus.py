@@ -0,0 +1,97 @@
+import argparse
+import os
+import random
+
+words = (
+    "ring shire hobbit elf dwarf wizard mountain river forest road tower "
+    "king queen sword song star light shadow journey council fellowship"
+).split()
+default_block_mix = {"paragraph": 6, "heading": 1, "list": 2, "quote": 1, "code": 1}
+
+
+def parse_block_mix(text):
+    block_mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in default_block_mix:
+            raise ValueError(f"Unknown block type: {name}")
+        block_mix[name.strip()] = float(weight)
+    return block_mix
+
+def sentence(rng, link_density, page_count):
+    text = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+    roll = rng.random()
+    if roll < link_density:
+        text += f" [{rng.choice(words)}](/pages/page{rng.randrange(page_count)})"
+    elif roll < link_density * 1.2:
+        text += f" ![{rng.choice(words)}](/images/{rng.choice(words)}.png)"
+    markup = rng.random()
+    if markup < 0.15:
+        text += f" **{rng.choice(words)}**"
+    elif markup < 0.25:
+        text += f" _{rng.choice(words)}_"
+    elif markup < 0.3:
+        text += f" `{rng.choice(words)}`"
+    return text + "."
+
+def make_block(rng, block_type, link_density, page_count):
+    if block_type == "heading":
+        return "#" * rng.randint(2, 4) + " " + sentence(rng, link_density, page_count)
+    if block_type == "list":
+        marker = rng.choice(["- ", "* ", None])
+        items = [sentence(rng, link_density, page_count) for _ in range(rng.randint(2, 6))]
+        if marker is None:
+            return "\n".join(f"{i + 1}. {item}" for i, item in enumerate(items))
+        return "\n".join(marker + item for item in items)
+    if block_type == "quote":
+        return "\n".join("> " + sentence(rng, link_density, page_count) for _ in range(rng.randint(1, 4)))
+    if block_type == "code":
+        lines = [f"let {rng.choice(words)} = {rng.randint(0, 99)};" for _ in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    return "\n".join(sentence(rng, link_density, page_count) for _ in range(rng.randint(2, 6)))
+
+def make_page(rng, index, page_count, blocks, block_mix, link_density):
+    names = list(block_mix)
+    weights = [block_mix[name] for name in names]
+    parts = [f"# Page {index}"]
+    for block_type in rng.choices(names, weights, k=blocks):
+        parts.append(make_block(rng, block_type, link_density, page_count))
+    return "\n\n".join(parts) + "\n"
+
+def generate_corpus(root, pages=100, blocks=50, block_mix=None, link_density=0.3, seed=0):
+    rng = random.Random(seed)
+    block_mix = block_mix or default_block_mix
+    content = os.path.join(root, "content", "pages")
+    os.makedirs(content, exist_ok=True)
+    os.makedirs(os.path.join(root, "static", "images"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n")
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(
+            '<!doctype html>\n<html>\n  <head>\n    <title>{{ Title }}</title>\n'
+            '    <link href="/index.css" rel="stylesheet" />\n  </head>\n\n'
+            '  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>'
+        )
+    with open(os.path.join(root, "content", "index.md"), "w") as f:
+        f.write("# Benchmark corpus\n\nGenerated pages for benchmarking.\n")
+    for index in range(pages):
+        with open(os.path.join(content, f"page{index}.md"), "w") as f:
+            f.write(make_page(rng, index, pages, blocks, block_mix, link_density))
+    return root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic content tree for benchmarks")
+    parser.add_argument("root", help="Directory to create content/, static/ and template.html in")
+    parser.add_argument("--pages", type=int, default=100, help="Number of pages to generate")
+    parser.add_argument("--blocks", type=int, default=50, help="Blocks per page (document size)")
+    parser.add_argument(
+        "--block-mix",
+        type=parse_block_mix,
+        default=default_block_mix,
+        help="Relative block weights, e.g. paragraph=6,heading=1,list=2,quote=1,code=1",
+    )
+    parser.add_argument("--link-density", type=float, default=0.3, help="Probability a sentence ends with a link")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    generate_corpus(args.root, args.pages, args.blocks, args.block_mix, args.link_density, args.seed)
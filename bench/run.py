@@ -0,0 +1,169 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(bench_dir), "src"))
+
+from corpus import generate_corpus, parse_block_mix, default_block_mix
+from generate_content import collect_pages, generate_page
+from inline_markdown import text_to_textnodes
+from markdown_blocks import (
+    markdown_to_blocks,
+    block_to_block_type,
+    markdown_to_html_node,
+    block_type_c,
+    block_type_h,
+    block_type_p,
+)
+from textnode import text_node_to_html_node
+import main as site_main
+
+default_baseline_path = os.path.join(bench_dir, "baseline.json")
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "repeat": repeat}
+
+def inline_texts(blocks):
+    texts = []
+    for block in blocks:
+        block_type = block_to_block_type(block)
+        if block_type == block_type_p:
+            texts.append(" ".join(block.split("\n")))
+        elif block_type == block_type_h:
+            texts.append(block.split(" ", 1)[1])
+        elif block_type != block_type_c:
+            texts.extend(line.split(" ", 1)[1] for line in block.split("\n"))
+    return texts
+
+def run_stages(root, repeat):
+    pages = collect_pages(os.path.join(root, "content"), os.path.join(root, "out"))
+    markdowns = []
+    for source_path, _ in pages:
+        with open(source_path) as f:
+            markdowns.append(f.read())
+    blocks = [block for markdown in markdowns for block in markdown_to_blocks(markdown)]
+    texts = inline_texts(blocks)
+    text_nodes = [node for text in texts for node in text_to_textnodes(text)]
+    html_nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+    template_path = os.path.join(root, "template.html")
+
+    def generate_pages():
+        for source_path, dest_path in pages:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            generate_page(source_path, template_path, dest_path, "/")
+
+    def full_build():
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            status = site_main.run([])
+        finally:
+            os.chdir(cwd)
+        if status:
+            raise RuntimeError(f"Full build failed with status {status}")
+
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(markdown) for markdown in markdowns],
+        "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in texts],
+        "text_node_to_html_node": lambda: [text_node_to_html_node(node) for node in text_nodes],
+        "to_html": lambda: [node.to_html() for node in html_nodes],
+        "generate_page": generate_pages,
+        "main": full_build,
+    }
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, func in stages.items():
+            results[name] = measure(func, repeat)
+    sizes = {
+        "pages": len(pages),
+        "bytes": sum(len(markdown) for markdown in markdowns),
+        "blocks": len(blocks),
+        "inline_texts": len(texts),
+        "text_nodes": len(text_nodes),
+    }
+    return results, sizes
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["min"] / previous["min"] if previous["min"] else 1.0
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:24} {previous['min'] * 1000:10.2f} ms -> {result['min'] * 1000:10.2f} ms  {ratio:6.2f}x  {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the site generator")
+    parser.add_argument("--pages", type=int, default=100, help="Number of generated pages")
+    parser.add_argument("--blocks", type=int, default=50, help="Blocks per page")
+    parser.add_argument("--block-mix", type=parse_block_mix, default=default_block_mix, help="Relative block weights")
+    parser.add_argument("--link-density", type=float, default=0.3, help="Probability a sentence ends with a link")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the fastest run is compared")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=default_baseline_path, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown per stage before it counts as a regression (0.10 = 10%%)",
+    )
+    args = parser.parse_args()
+
+    corpus_params = {
+        "pages": args.pages,
+        "blocks": args.blocks,
+        "block_mix": args.block_mix,
+        "link_density": args.link_density,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, args.pages, args.blocks, args.block_mix, args.link_density, args.seed)
+        stages, sizes = run_stages(root, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus": corpus_params,
+        "sizes": sizes,
+        "stages": stages,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    if not os.path.exists(args.baseline):
+        for name, result in stages.items():
+            print(f"{name:24} {result['min'] * 1000:10.2f} ms")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("corpus") != corpus_params:
+        print("Warning: baseline was recorded with different corpus parameters.")
+    regressions = compare(stages, baseline, args.threshold)
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
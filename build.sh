@@ -1 +1 @@
-python src/main.py "/static_site_generator/"
\ No newline at end of file
+python src/build_client.py "/static_site_generator/"
\ No newline at end of file
@@ -1,9 +1,7 @@
 #!/bin/bash
 
-python src/main.py
+python3 server.py --watch --port 8888
 if [ $? -ne 0 ]; then
     echo "Something went wrong with generating the server's files."
     exit 1
-else
-    cd public && python3 -m http.server 8888
-fi
\ No newline at end of file
+fi
@@ -1,6 +1,513 @@
 import os
+import re
+import sys
+import json
+import time
+import signal
+import asyncio
 import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict, deque
+from email.utils import formatdate
+from functools import partial
+from http import HTTPStatus
+from http.client import parse_headers
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from copy_static import fingerprint_length
+
+stats_path = "/__stats"
+precompressed_variants = (("br", ".br"), ("gzip", ".gz"))
+fingerprinted_pattern = re.compile(rf"\.[0-9a-f]{{{fingerprint_length}}}\.\w+$")
+immutable_cache_control = "public, max-age=31536000, immutable"
+default_max_connections = 256
+keep_alive_timeout = 15
+shutdown_timeout = 10
+latency_samples = 10000
+latency_percentiles = (50, 90, 99)
+livereload_path = "/__livereload"
+livereload_script = (
+    '<script>new EventSource("' + livereload_path + '").onmessage = () => location.reload();</script>'
+).encode()
+
+
+class FileCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_file_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, path, stat):
+        # Returns (body, etag) without touching the file, or None when it has to be read.
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1], entry[2]
+        return None
+
+    def get(self, path, stat):
+        found = self.lookup(path, stat)
+        if found is not None:
+            return found
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            self.misses += 1
+        if stat.st_size > self.max_file_bytes:
+            return None, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        with self.lock:
+            old_entry = self.entries.pop(path, None)
+            if old_entry is not None:
+                self.size -= len(old_entry[1])
+            self.entries[path] = (key, body, etag)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return body, etag
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def parse_range(header, size):
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if start == "":
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepted_encodings(header):
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def negotiate_encoding(path, stat, accept_encoding):
+    # Returns (variant_path, variant_stat, encoding, has_variants) for a
+    # precompressed sibling written by the build, if the client accepts it.
+    encodings = accepted_encodings(accept_encoding)
+    has_variants = False
+    for encoding, suffix in precompressed_variants:
+        try:
+            variant_stat = os.stat(path + suffix)
+        except OSError:
+            continue
+        if variant_stat.st_mtime_ns < stat.st_mtime_ns:
+            continue
+        has_variants = True
+        if encodings.get(encoding, encodings.get("*", 0)) > 0:
+            return path + suffix, variant_stat, encoding, True
+    return path, stat, None, has_variants
+
+
+def file_response(cache, path, request_headers, content_type, cached_only=False):
+    # Returns (status, headers, body, body_path, start, end). body is None when
+    # the file is too large for the cache and has to be streamed from body_path.
+    # With cached_only, returns None instead of reading a file that is not cached.
+    stat = os.stat(path)
+    body_path, body_stat, encoding, has_variants = negotiate_encoding(
+        path, stat, request_headers.get("Accept-Encoding", "")
+    )
+    if cached_only:
+        found = cache.lookup(body_path, body_stat)
+        if found is None:
+            return None
+        body, etag = found
+    else:
+        body, etag = cache.get(body_path, body_stat)
+    size = body_stat.st_size if body is None else len(body)
+    vary = [("Vary", "Accept-Encoding")] if has_variants else []
+    if etag_matches(request_headers.get("If-None-Match", ""), etag):
+        return HTTPStatus.NOT_MODIFIED, [("ETag", etag)] + vary, None, None, 0, -1
+    byte_range = parse_range(request_headers.get("Range"), size)
+    if byte_range is False:
+        headers = [("Content-Range", f"bytes */{size}"), ("Content-Length", "0")]
+        return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers, None, None, 0, -1
+    start, end = byte_range or (0, size - 1)
+    headers = []
+    if byte_range:
+        status = HTTPStatus.PARTIAL_CONTENT
+        headers.append(("Content-Range", f"bytes {start}-{end}/{size}"))
+    else:
+        status = HTTPStatus.OK
+    headers.append(("Content-Type", content_type))
+    if encoding is not None:
+        headers.append(("Content-Encoding", encoding))
+    headers += vary
+    headers += [
+        ("Content-Length", str(end - start + 1)),
+        ("ETag", etag),
+        ("Last-Modified", formatdate(stat.st_mtime, usegmt=True)),
+        ("Accept-Ranges", "bytes"),
+    ]
+    if fingerprinted_pattern.search(path):
+        headers.append(("Cache-Control", immutable_cache_control))
+    return status, headers, body, body_path, start, end
+
+
+class CachingHTTPRequestHandler(SimpleHTTPRequestHandler):
+    cache = FileCache()
+
+    def do_GET(self):
+        self.send_cached(head=False)
+
+    def do_HEAD(self):
+        self.send_cached(head=True)
+
+    def fallback(self, head):
+        if head:
+            super().do_HEAD()
+        else:
+            super().do_GET()
+
+    def send_stats(self, head):
+        body = json.dumps(self.cache.stats()).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def resolve_file(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+                return None
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            return None
+        return path
+
+    def send_cached(self, head):
+        if self.path == stats_path:
+            self.send_stats(head)
+            return
+        path = self.resolve_file()
+        if path is None:
+            self.fallback(head)
+            return
+        try:
+            status, headers, body, body_path, start, end = file_response(
+                self.cache, path, self.headers, self.guess_type(path)
+            )
+        except OSError:
+            self.fallback(head)
+            return
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if head or end < start:
+            return
+        if body is not None:
+            self.wfile.write(body[start:end + 1])
+            return
+        with open(body_path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(remaining, 1 << 16))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+class LiveReload:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self, changed=None):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class LiveReloadHandler(CachingHTTPRequestHandler):
+    livereload = None
+
+    def do_GET(self):
+        if self.path == livereload_path:
+            self.send_events()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        index = body.rfind(b"</body>")
+        if index == -1:
+            index = len(body)
+        body = body[:index] + livereload_script + body[index:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.livereload.version
+        try:
+            while True:
+                new_version = self.livereload.wait(version, 15)
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def percentile(sorted_values, p):
+    index = max(0, -(-len(sorted_values) * p // 100) - 1)
+    return sorted_values[index]
+
+
+class AsyncServer:
+    def __init__(self, directory, cache, max_connections=default_max_connections):
+        self.directory = os.path.abspath(directory)
+        self.cache = cache
+        self.max_connections = max_connections
+        self.connections = {}
+        self.idle = set()
+        self.closing = False
+        self.requests = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=latency_samples)
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        stats = self.cache.stats()
+        stats.update({
+            "connections": len(self.connections),
+            "max_connections": self.max_connections,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "latency_ms": {
+                f"p{p}": round(percentile(latencies, p) * 1000, 3) if latencies else None
+                for p in latency_percentiles
+            },
+        })
+        return stats
+
+    def resolve_file(self, url_path):
+        # Returns (path, redirect); like SimpleHTTPRequestHandler, paths never leave the directory.
+        parts = [part for part in unquote(url_path).split("/") if part not in ("", ".", "..")]
+        path = os.path.join(self.directory, *parts)
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                return None, url_path + "/"
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            return None, None
+        return path, None
+
+    async def handle(self, reader, writer):
+        if self.closing or len(self.connections) >= self.max_connections:
+            self.rejected += 1
+            await self.send(writer, HTTPStatus.SERVICE_UNAVAILABLE, [("Retry-After", "1"), ("Content-Length", "0")])
+            await close_writer(writer)
+            return
+        self.connections[asyncio.current_task()] = writer
+        try:
+            keep_alive = True
+            while keep_alive and not self.closing:
+                self.idle.add(writer)
+                try:
+                    request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), keep_alive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+                finally:
+                    self.idle.discard(writer)
+                started = time.perf_counter()
+                keep_alive = await self.respond(request, reader, writer)
+                self.latencies.append(time.perf_counter() - started)
+                self.requests += 1
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            # The client went away or sent less of the body than it announced.
+            pass
+        finally:
+            self.connections.pop(asyncio.current_task(), None)
+            await close_writer(writer)
+
+    async def send(self, writer, status, headers, body=b"", head=False, keep_alive=False):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {formatdate(usegmt=True)}"]
+        lines += [f"{name}: {value}" for name, value in headers]
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body and not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def send_error(self, writer, status, head=False, keep_alive=False, headers=()):
+        body = f"{status.value} {status.phrase}\n".encode()
+        headers = [("Content-Type", "text/plain"), ("Content-Length", str(len(body))), *headers]
+        await self.send(writer, status, headers, body, head, keep_alive)
+
+    async def respond(self, request, reader, writer):
+        request_line, _, header_lines = request.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+            headers = parse_headers(BytesIO(header_lines))
+            content_length = int(headers.get("Content-Length", 0))
+        except ValueError:
+            await self.send_error(writer, HTTPStatus.BAD_REQUEST)
+            return False
+        connection = headers.get("Connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = "close" not in connection
+        else:
+            keep_alive = version == "HTTP/1.0" and "keep-alive" in connection
+        if "Transfer-Encoding" in headers:
+            keep_alive = False
+        elif content_length > 0:
+            await reader.readexactly(content_length)
+        keep_alive = keep_alive and not self.closing
+        head = method == "HEAD"
+        if method not in ("GET", "HEAD"):
+            await self.send_error(writer, HTTPStatus.NOT_IMPLEMENTED, keep_alive=keep_alive)
+            return keep_alive
+        url_path = target.split("?", 1)[0].split("#", 1)[0]
+        if url_path == stats_path:
+            body = json.dumps(self.stats()).encode()
+            headers = [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                ("Cache-Control", "no-store"),
+            ]
+            await self.send(writer, HTTPStatus.OK, headers, body, head, keep_alive)
+            return keep_alive
+        path, redirect = self.resolve_file(url_path)
+        if redirect is not None:
+            await self.send_error(writer, HTTPStatus.MOVED_PERMANENTLY, head, keep_alive, [("Location", redirect)])
+            return keep_alive
+        try:
+            if path is None:
+                raise FileNotFoundError(url_path)
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response = file_response(self.cache, path, headers, content_type, cached_only=True)
+            if response is None:
+                # Reading and hashing an uncached file would stall every other connection.
+                response = await asyncio.to_thread(file_response, self.cache, path, headers, content_type)
+            status, response_headers, body, body_path, start, end = response
+        except OSError:
+            await self.send_error(writer, HTTPStatus.NOT_FOUND, head, keep_alive)
+            return keep_alive
+        if body is not None or head or end < start:
+            body = body[start:end + 1] if body is not None else b""
+            await self.send(writer, status, response_headers, body, head, keep_alive)
+            return keep_alive
+        await self.send(writer, status, response_headers, keep_alive=keep_alive)
+        # Large files go straight from the page cache to the socket with os.sendfile.
+        with open(body_path, "rb") as f:
+            await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start + 1)
+        return keep_alive
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"Serving HTTP on http://localhost:{port} from directory '{self.directory}' (asyncio, max {self.max_connections} connections)...")
+        await stop.wait()
+        await self.shutdown(server)
+
+    async def shutdown(self, server):
+        # Stop accepting, drop idle keep-alive connections and let in-flight requests finish.
+        print("Shutting down, waiting for open requests...")
+        self.closing = True
+        server.close()
+        for writer in list(self.idle):
+            writer.close()
+        if self.connections:
+            _, pending = await asyncio.wait(list(self.connections), timeout=shutdown_timeout)
+            for task in pending:
+                self.connections[task].transport.abort()
+        await server.wait_closed()
+
+
+async def close_writer(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
 
 
 def run(
@@ -17,12 +524,86 @@ def run(
     httpd.serve_forever()
 
 
+def run_async(port=8888, directory=None, cache=None, max_connections=default_max_connections):
+    server = AsyncServer(directory or ".", cache or FileCache(), max_connections)
+    asyncio.run(server.serve("", port))
+
+
+def run_watch(port=8888, directory=None, build_args=None, livereload=True):
+    # Imported here so plain serving does not depend on the generator modules.
+    import main
+
+    directory = directory or main.dir_path_docs
+    args = main.parse_args(build_args or [])
+    try:
+        main.build_incremental(args)
+    except ValueError as e:
+        print(e)
+    handler_class = CachingHTTPRequestHandler
+    on_build = None
+    if livereload:
+        reloader = LiveReload()
+        handler_class = type("Handler", (LiveReloadHandler,), {"livereload": reloader})
+        on_build = reloader.notify
+    httpd = ThreadingHTTPServer(("", port), partial(handler_class, directory=directory))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
+    try:
+        main.watch_and_build(args, on_build)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="HTTP Server")
     parser.add_argument(
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=64,
+        help="Size limit in MB for the in-memory file cache (0 disables caching)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Build the site, serve it and rebuild on changes (run from the project root)",
+    )
+    parser.add_argument(
+        "--no-livereload",
+        action="store_true",
+        help="Do not reload open browser tabs after a rebuild in --watch mode",
+    )
+    parser.add_argument(
+        "--basepath", type=str, help="Basepath used for --watch builds", default="/"
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Serve with an asyncio server supporting keep-alive and many concurrent connections",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=default_max_connections,
+        help="Open connections allowed in --async mode before new ones get 503",
+    )
     args = parser.parse_args()
+    if args.use_async and args.watch:
+        parser.error("--async cannot be combined with --watch")
 
-    run(port=args.port, directory=args.dir)
+    CachingHTTPRequestHandler.cache = FileCache(args.cache_size * 1024 * 1024)
+    if args.watch:
+        directory = args.dir if args.dir != "." else None
+        run_watch(args.port, directory, [args.basepath], not args.no_livereload)
+    elif args.use_async:
+        run_async(args.port, args.dir, CachingHTTPRequestHandler.cache, args.max_connections)
+    else:
+        handler_class = CachingHTTPRequestHandler if args.cache_size else SimpleHTTPRequestHandler
+        run(handler_class=handler_class, port=args.port, directory=args.dir)
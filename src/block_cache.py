@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+cache_format_version = "2"
+# Output of these modules is what gets cached, so editing any of them
+# invalidates every entry.
+parser_modules = (
+    "markdown_blocks.py", "inline_markdown.py", "textnode.py", "htmlnode.py", "highlight.py", "template.py"
+)
+query_batch_size = 500
+
+
+def parser_version():
+    digest = hashlib.sha256(cache_format_version.encode())
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in parser_modules:
+        with open(os.path.join(source_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class BlockCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, version=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version or parser_version()
+        self.connection = None
+        self.connection_pid = None
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; workers open their own.
+        state = self.__dict__.copy()
+        state["connection"] = None
+        state["connection_pid"] = None
+        return state
+
+    def connect(self):
+        if self.connection is not None and self.connection_pid == os.getpid():
+            return self.connection
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            "key BLOB PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL"
+            ")"
+        )
+        self.connection = connection
+        self.connection_pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connect()
+        connection.execute("BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def key(self, namespace, block_type, block):
+        digest = hashlib.sha256()
+        for part in (self.version, namespace, block_type, block):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.digest()
+
+    def get_many(self, keys):
+        connection = self.connect()
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for i in range(0, len(keys), query_batch_size):
+            batch = keys[i:i + query_batch_size]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(f"SELECT key, html FROM blocks WHERE key IN ({placeholders})", batch)
+            found.update(rows)
+        if found:
+            hit_keys = list(found)
+            with self.transaction():
+                for i in range(0, len(hit_keys), query_batch_size):
+                    batch = hit_keys[i:i + query_batch_size]
+                    placeholders = ",".join("?" * len(batch))
+                    connection.execute(
+                        f"UPDATE blocks SET used = ? WHERE key IN ({placeholders})", [time.time_ns(), *batch]
+                    )
+        return found
+
+    def put_many(self, entries):
+        used = time.time_ns()
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, used) VALUES (?, ?, ?, ?)",
+                [(key, html, len(html.encode()), used) for key, html in entries.items()],
+            )
+
+    def prune(self):
+        connection = self.connect()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM blocks ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        with self.transaction():
+            connection.executemany("DELETE FROM blocks WHERE key = ?", evicted)
+        connection.execute("VACUUM")
+        return len(evicted)
+
+    def close(self):
+        if self.connection is not None and self.connection_pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+
+class MemoryBlockCache:
+    # Same interface as BlockCache, kept in process memory by the build daemon.
+    def __init__(self, max_bytes=64 * 1024 * 1024, version=None):
+        self.max_bytes = max_bytes
+        self.version = version or parser_version()
+        self.entries = OrderedDict()
+        self.size = 0
+
+    key = BlockCache.key
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                found[key] = html
+        return found
+
+    def put_many(self, entries):
+        for key, html in entries.items():
+            old_html = self.entries.pop(key, None)
+            if old_html is not None:
+                self.size -= len(old_html)
+            self.entries[key] = html
+            self.size += len(html)
+        while self.size > self.max_bytes:
+            _, html = self.entries.popitem(last=False)
+            self.size -= len(html)
+
+    def prune(self):
+        pass
+
+    def close(self):
+        pass
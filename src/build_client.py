@@ -0,0 +1,36 @@
+import json
+import os
+import socket
+import sys
+
+# Kept free of generator imports so that talking to the daemon costs only interpreter startup.
+socket_path = os.path.join(".cache", "build.sock")
+main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def request_build(connection, argv):
+    connection.sendall(json.dumps({"cwd": os.getcwd(), "argv": argv}).encode() + b"\n")
+    for line in connection.makefile("rb"):
+        message = json.loads(line)
+        if "output" in message:
+            sys.stdout.write(message["output"])
+        else:
+            return message["exit"]
+    print("The build daemon closed the connection before the build finished.")
+    return 1
+
+def main():
+    argv = sys.argv[1:]
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        # No daemon for this project: build in a fresh process instead.
+        connection.close()
+        os.execv(sys.executable, [sys.executable, main_path, *argv])
+    with connection:
+        status = request_build(connection, argv)
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from block_cache import MemoryBlockCache
+from build_client import socket_path
+import main
+
+
+class ClientWriter:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, text):
+        if text:
+            self.connection.sendall(json.dumps({"output": text}).encode() + b"\n")
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run_request(request, memory_cache):
+    if request.get("cwd") != os.getcwd():
+        print(f"This daemon builds {os.getcwd()}; run the client from there or start a daemon in {request.get('cwd')}.")
+        return 1
+    argv = request.get("argv", [])
+    try:
+        if main.parse_args(argv).watch:
+            print("--watch is not supported through the build daemon.")
+            return 1
+        return main.run(argv, memory_cache)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+def handle(connection, memory_cache):
+    line = connection.makefile("rb").readline()
+    if not line:
+        # A client checking whether the daemon is up.
+        return
+    request = json.loads(line)
+    started = time.perf_counter()
+    writer = ClientWriter(connection)
+    with redirect_stdout(writer), redirect_stderr(writer):
+        status = run_request(request, memory_cache)
+    connection.sendall(json.dumps({"exit": status}).encode() + b"\n")
+    print(f"Built {' '.join(request.get('argv', [])) or '/'} with status {status} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def daemon_running(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(path)
+        except OSError:
+            return False
+    return True
+
+def serve(path=socket_path, cache_size=64):
+    if os.path.exists(path):
+        if daemon_running(path):
+            print(f"A build daemon is already listening on {path}.")
+            return 1
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Templates, content listings and rendered blocks stay warm between builds.
+    memory_cache = MemoryBlockCache(cache_size * 1024 * 1024)
+    print(f"Build daemon for {os.getcwd()} listening on {path}...")
+    try:
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                try:
+                    handle(connection, memory_cache)
+                except (ConnectionError, ValueError) as e:
+                    print(f"Dropped a build request: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(path)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the generator loaded and serve build requests from build_client.py")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=64,
+        help="Size limit in MB for rendered blocks kept in memory between builds",
+    )
+    args = parser.parse_args()
+    sys.exit(serve(cache_size=args.cache_size))
@@ -0,0 +1,82 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import file_hash
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+compressible_extensions = (".html", ".css", ".svg", ".js", ".json", ".xml", ".txt")
+compressed_suffixes = (".gz", ".br")
+
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def compress_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    write_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_atomic(path + ".br", brotli.compress(data))
+    elif os.path.exists(path + ".br"):
+        os.remove(path + ".br")
+
+def remove_compressed(path):
+    for suffix in compressed_suffixes:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def refresh_compressed(path):
+    # A page rewritten with the same bytes keeps its variants, which must not look older than it.
+    mtime_ns = os.stat(path).st_mtime_ns
+    for suffix in compressed_suffixes:
+        if os.path.exists(path + suffix) and os.stat(path + suffix).st_mtime_ns < mtime_ns:
+            os.utime(path + suffix, ns=(mtime_ns, mtime_ns))
+
+def compression_targets(directory, threshold):
+    targets = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(compressible_extensions):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) >= threshold:
+                targets.append(path)
+    return targets
+
+def compress_dir(directory, previous=None, threshold=1024, jobs=1):
+    previous = previous or {}
+    hashes = {}
+    pending = []
+    for path in compression_targets(directory, threshold):
+        relative_path = os.path.relpath(path, directory)
+        hashes[relative_path] = file_hash(path)
+        up_to_date = (
+            previous.get(relative_path) == hashes[relative_path] and
+            os.path.exists(path + ".gz") and
+            (brotli is None or os.path.exists(path + ".br"))
+        )
+        if up_to_date:
+            refresh_compressed(path)
+        else:
+            pending.append(path)
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(compress_file, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        for path in pending:
+            compress_file(path)
+    for relative_path in previous:
+        if relative_path not in hashes:
+            remove_compressed(os.path.join(directory, relative_path))
+    encodings = "gzip and brotli" if brotli is not None else "gzip"
+    print(f"Compressed {len(pending)} of {len(hashes)} files with {encodings}.")
+    return hashes
@@ -1,4 +1,25 @@
-import os, shutil
+import hashlib
+import json
+import os, posixpath, re, shutil
+from urllib.parse import urlsplit
+from manifest import file_hash
+from pipeline import atomic_write
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+link_modes = ("copy", "hardlink", "reflink")
+FICLONE = 0x40049409
+fingerprint_length = 10
+# Files that are looked up by their exact name and must keep it.
+unfingerprinted_names = ("CNAME", "robots.txt", "favicon.ico")
+unfingerprinted_extensions = (".html", ".htm")
+stylesheet_extensions = (".css",)
+css_url_pattern = re.compile(r"""url\(\s*(["']?)([^"')\s]+)\1\s*\)""")
+hash_cache_version = 1
+
 
 def copy_dir(source, target):
     try:
@@ -15,4 +36,197 @@ def copy_dir(source, target):
             shutil.copy(source_file, target)
         else:
             target_file = os.path.join(target, dir_or_file)
-            copy_dir(source_file, target_file)
\ No newline at end of file
+            copy_dir(source_file, target_file)
+
+def remove_file(path, root):
+    if os.path.lexists(path):
+        os.remove(path)
+    directory = os.path.dirname(path)
+    root = os.path.abspath(root)
+    while os.path.abspath(directory).startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+def is_up_to_date(source_stat, target_path):
+    try:
+        target_stat = os.stat(target_path)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(source_stat, target_stat):
+        return True
+    return (target_stat.st_size == source_stat.st_size and
+            target_stat.st_mtime_ns == source_stat.st_mtime_ns)
+
+def reflink_file(source_path, target_path):
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform.")
+    with open(source_path, "rb") as source_file, open(target_path, "wb") as target_file:
+        fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source_path, target_path)
+
+def sync_file(source_path, target_path, link_mode="copy"):
+    if os.path.lexists(target_path):
+        os.remove(target_path)
+    try:
+        if link_mode == "hardlink":
+            os.link(source_path, target_path)
+            return
+        if link_mode == "reflink":
+            reflink_file(source_path, target_path)
+            return
+    except OSError:
+        pass
+    shutil.copy2(source_path, target_path)
+
+def fingerprint_path(relative_path, digest):
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:fingerprint_length]}{extension}"
+
+def should_fingerprint(relative_path):
+    name = os.path.basename(relative_path)
+    return name not in unfingerprinted_names and not name.endswith(unfingerprinted_extensions)
+
+class FileHashCache:
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.seen = set()
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if isinstance(cache, dict) and cache.get("version") == hash_cache_version:
+            self.files = cache["files"]
+
+    def hash(self, path):
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": file_hash(path)}
+            self.files[path] = entry
+        self.seen.add(path)
+        return entry["hash"]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        files = {path: entry for path, entry in self.files.items() if path in self.seen}
+        atomic_write(self.path, json.dumps({"version": hash_cache_version, "files": files}))
+
+def css_url_target(url, relative_path):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith("/"):
+        return posixpath.normpath(parts.path[1:])
+    return posixpath.normpath(posixpath.join(posixpath.dirname(relative_path), parts.path))
+
+def rewrite_css_urls(text, relative_path, names):
+    def replace(match):
+        quote, url = match.groups()
+        name = names.get(css_url_target(url, relative_path))
+        if name is None:
+            return match.group(0)
+        path = urlsplit(url).path
+        # Fingerprinting only renames the file, so the url keeps its directory part.
+        new_path = path[:len(path) - len(posixpath.basename(path))] + posixpath.basename(name)
+        return f"url({quote}{new_path}{url[len(path):]}{quote})"
+    return css_url_pattern.sub(replace, text)
+
+def is_stylesheet(relative_path):
+    return relative_path.endswith(stylesheet_extensions) and should_fingerprint(relative_path)
+
+def read_stylesheet(path):
+    with open(path) as f:
+        return f.read()
+
+def asset_names(source, hash_cache=None):
+    hash_file = hash_cache.hash if hash_cache is not None else file_hash
+    names = {}
+    stylesheets = {}
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            source_path = os.path.join(root, name)
+            relative_path = os.path.relpath(source_path, source).replace(os.sep, "/")
+            if is_stylesheet(relative_path):
+                stylesheets[relative_path] = source_path
+            elif should_fingerprint(relative_path):
+                names[relative_path] = fingerprint_path(relative_path, hash_file(source_path))
+
+    # Stylesheets are named after their text with url() references rewritten, so
+    # a changed font or image also renames every stylesheet that points to it.
+    def name_stylesheet(relative_path, pending):
+        if relative_path in names or relative_path in pending:
+            return
+        pending.add(relative_path)
+        text = read_stylesheet(stylesheets[relative_path])
+        for match in css_url_pattern.finditer(text):
+            target = css_url_target(match.group(2), relative_path)
+            if target in stylesheets:
+                name_stylesheet(target, pending)
+        text = rewrite_css_urls(text, relative_path, names)
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        names[relative_path] = fingerprint_path(relative_path, digest)
+
+    for relative_path in stylesheets:
+        name_stylesheet(relative_path, set())
+    return dict(sorted(names.items()))
+
+def static_output(relative_path, names):
+    if names is None:
+        return relative_path
+    return os.path.normpath(names.get(relative_path.replace(os.sep, "/"), relative_path))
+
+def static_outputs(source, names=None):
+    outputs = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        relative_root = os.path.relpath(root, source)
+        for name in sorted(files):
+            outputs.append(static_output(os.path.normpath(os.path.join(relative_root, name)), names))
+    return outputs
+
+def sync_dir(source, target, previous=(), link_mode="copy", names=None):
+    if link_mode not in link_modes:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Missing source directory: {source}")
+    synced = []
+    copied = 0
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        relative_root = os.path.relpath(root, source)
+        os.makedirs(os.path.join(target, relative_root), exist_ok=True)
+        for name in sorted(files):
+            relative_path = os.path.normpath(os.path.join(relative_root, name))
+            source_path = os.path.join(source, relative_path)
+            source_relative_path = relative_path.replace(os.sep, "/")
+            relative_path = static_output(relative_path, names)
+            target_path = os.path.join(target, relative_path)
+            synced.append(relative_path)
+            if names is not None and is_stylesheet(source_relative_path) and source_relative_path in names:
+                # Written with rewritten urls under a name derived from that text.
+                if os.path.exists(target_path):
+                    continue
+                text = rewrite_css_urls(read_stylesheet(source_path), source_relative_path, names)
+                atomic_write(target_path, text)
+                copied += 1
+                continue
+            if is_up_to_date(os.stat(source_path), target_path):
+                continue
+            sync_file(source_path, target_path, link_mode)
+            copied += 1
+    current = set(synced)
+    removed = 0
+    for relative_path in previous:
+        if relative_path not in current:
+            remove_file(os.path.join(target, relative_path), target)
+            removed += 1
+    print(f"Synced {copied} of {len(synced)} static files, removed {removed} stale files.")
+    return synced
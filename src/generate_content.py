@@ -1,6 +1,22 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from itertools import chain
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
+from htmlnode import ParentNode
+from markdown_blocks import markdown_to_blocks, iter_markdown_blocks, blocks_to_html_node
+from copy_static import remove_file
+from manifest import file_hash
+from minify import MinifyingWriter
+from metadata import read_front_matter, read_metadata, split_front_matter
+from pipeline import pipelined
+from profiler import Profiler, null_profiler
+from template import load_template
+
+# Content directory listings, reused by collect_pages while no directory changes.
+listing_settle_ns = 2 * 10**9
+content_listings = {}
 
 
 def extract_title(markdown):
@@ -9,23 +25,85 @@ def extract_title(markdown):
             return line[2:]
     raise ValueError("Invalid markdown: missing h1 header.")
 
+def extract_title_from_file(from_path):
+    metadata = read_metadata(from_path)
+    if "title" not in metadata:
+        raise ValueError("Invalid markdown: missing h1 header.")
+    return metadata["title"]
+
+def page_title(metadata, markdown):
+    if "title" in metadata:
+        return metadata["title"]
+    return extract_title(markdown)
+
 def generate_page(from_path, template_path, dest_path, basepath):
     if not os.path.exists(from_path) or not os.path.exists(template_path):
         raise FileNotFoundError("Something's wrong with the paths provided...")
     print(f"Generating page from {from_path} to {dest_path} using template: {template_path}")
-    with open(from_path) as markdown_file:
-        markdown = markdown_file.read()
-    with open(template_path) as template_file:
-        template = template_file.read()
-    content = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-    page = template.replace(
-        "{{ Title }}", title).replace(
-            "{{ Content }}", content).replace(
-                'href="/', 'href="' + basepath).replace(
-                    'src="/', 'src="' + basepath)
-    with open(dest_path, 'w') as html:
-        html.write(page)
+    write_page(from_path, load_template(template_path, basepath), dest_path)
+
+def write_output(html, template, minify, **values):
+    if not minify:
+        template.write(html, **values)
+        return None
+    out = MinifyingWriter(html)
+    template.write(out, **values)
+    out.close()
+    return out.saved
+
+def write_page(from_path, template, dest_path, profiler=null_profiler, block_cache=None, minify=False, rewriter=None):
+    with profiler.stage("read", from_path):
+        with open(from_path) as markdown_file:
+            metadata, markdown = split_front_matter(markdown_file.read())
+    with profiler.stage("block split", from_path):
+        blocks = markdown_to_blocks(markdown)
+    with profiler.stage("inline parse", from_path):
+        content_node = blocks_to_html_node(blocks, block_cache, rewriter or template.page_rewriter())
+        title = page_title(metadata, markdown)
+    if not profiler.enabled:
+        with open(dest_path, 'w') as html:
+            return write_output(html, template, minify, Title=title, Content=content_node)
+    with profiler.stage("render", from_path):
+        content = content_node.to_html()
+    with profiler.stage("template", from_path):
+        page = template.render(Title=title, Content=content)
+    with profiler.stage("write", from_path):
+        with open(dest_path, 'w') as html:
+            if not minify:
+                html.write(page)
+                return None
+            out = MinifyingWriter(html)
+            out.write(page)
+            out.close()
+            return out.saved
+
+def render_page(markdown, template, profiler=null_profiler, page=None, block_cache=None, minify=False, rewriter=None):
+    with profiler.stage("block split", page):
+        metadata, markdown = split_front_matter(markdown)
+        blocks = markdown_to_blocks(markdown)
+    with profiler.stage("inline parse", page):
+        content_node = blocks_to_html_node(blocks, block_cache, rewriter or template.page_rewriter())
+        title = page_title(metadata, markdown)
+    with profiler.stage("render", page):
+        out = StringIO()
+        saved = write_output(out, template, minify, Title=title, Content=content_node)
+    return out.getvalue(), saved
+
+def iter_content_nodes(markdown_file, template, block_cache=None, rewriter=None):
+    _, pending = read_front_matter(markdown_file)
+    rewriter = rewriter or template.page_rewriter()
+    for block in iter_markdown_blocks(chain(pending, markdown_file)):
+        yield from blocks_to_html_node([block], block_cache, rewriter).children
+
+def write_page_streaming(
+    from_path, template, dest_path, profiler=null_profiler, block_cache=None, minify=False, rewriter=None
+):
+    with profiler.stage("read", from_path):
+        title = extract_title_from_file(from_path)
+    with profiler.stage("stream", from_path):
+        with open(from_path) as markdown_file, open(dest_path, 'w') as html:
+            content_node = ParentNode("div", iter_content_nodes(markdown_file, template, block_cache, rewriter))
+            return write_output(html, template, minify, Title=title, Content=content_node)
 
 def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
     if not os.path.exists(dir_path_content) or not os.path.exists(template_path) or not os.path.exists(dest_dir_path):
@@ -47,3 +125,231 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
             dest_path = Path(target_dir_or_file).with_suffix(".html")
             generate_page(source_dir_or_file, template_path, dest_path, basepath)
 
+
+def scan_content(dir_path, directories, files):
+    # The directory is stat'ed before it is listed, so a later change always shows in its mtime.
+    directories.append((dir_path, os.stat(dir_path).st_mtime_ns))
+    with os.scandir(dir_path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    subdirectories = []
+    for entry in entries:
+        if not entry.is_dir():
+            files.append(entry.path)
+        elif not entry.is_symlink():
+            subdirectories.append(entry.path)
+    for subdirectory in subdirectories:
+        scan_content(subdirectory, directories, files)
+
+def content_files(dir_path_content):
+    # Adding, removing or renaming a file changes its directory's mtime, so the
+    # listing is reused until one of the directories changes.
+    key = os.path.abspath(dir_path_content)
+    listing = content_listings.get(key)
+    if listing is not None:
+        directories, files = listing
+        try:
+            if all(os.stat(path).st_mtime_ns == mtime for path, mtime in directories):
+                return files
+        except FileNotFoundError:
+            pass
+    directories = []
+    files = []
+    scanned_at = time.time_ns()
+    scan_content(dir_path_content, directories, files)
+    # mtimes have a coarse granularity; a directory changed just before the scan
+    # could change again without a new mtime.
+    if all(mtime < scanned_at - listing_settle_ns for _, mtime in directories):
+        content_listings[key] = (directories, files)
+    else:
+        content_listings.pop(key, None)
+    return files
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for source_path in content_files(dir_path_content):
+        relative_path = os.path.relpath(source_path, dir_path_content)
+        dest_path = Path(dest_dir_path, relative_path).with_suffix(".html")
+        pages.append((source_path, str(dest_path)))
+    return pages
+
+def generate_page_job(job):
+    options, from_path, dest_path = job
+    page_writer = write_page_streaming if options["stream"] else write_page
+    profiler = Profiler() if options["profile"] else null_profiler
+    rewriter = options["template"].page_rewriter()
+    try:
+        saved = page_writer(
+            from_path, options["template"], dest_path, profiler, rewriter=rewriter, **options["page_options"]
+        )
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", profiler.records, None, None
+    return None, profiler.records, saved, rewriter.link_graph()
+
+def report_minified(minified):
+    if minified:
+        print(f"Minification saved {sum(minified.values())} bytes across {len(minified)} pages.")
+
+def generate_pages_pipelined(
+    pages, template, template_path, read_ahead, profiler=null_profiler, block_cache=None, minify=False,
+    link_graph=None
+):
+    saved_bytes = {}
+    rewriters = {}
+
+    def render(from_path, markdown):
+        rewriter = rewriters[from_path] = template.page_rewriter()
+        page, saved_bytes[from_path] = render_page(
+            markdown, template, profiler, from_path, block_cache, minify, rewriter
+        )
+        return page
+
+    dest_paths = dict(pages)
+    failures = []
+    minified = {}
+    for from_path, error in pipelined(pages, render, read_ahead, profiler):
+        rewriter = rewriters.pop(from_path, None)
+        if error is None:
+            dest_path = dest_paths[from_path]
+            print(f"Generating page from {from_path} to {dest_path} using template: {template_path}")
+            if link_graph is not None:
+                link_graph[dest_path] = rewriter.link_graph()
+            saved = saved_bytes.pop(from_path)
+            if saved is not None:
+                print(f"Minified {dest_path}: saved {saved} bytes")
+                minified[dest_path] = saved
+            continue
+        print(f"Failed to generate page from {from_path}: {error}")
+        failures.append(from_path)
+    report_minified(minified)
+    return failures
+
+def generate_pages(
+    pages, template_path, basepath, jobs=1, profiler=null_profiler, stream=False, assets=None, images=None,
+    read_ahead=0, link_graph=None, **page_options
+):
+    if not os.path.exists(template_path):
+        raise FileNotFoundError("Something's wrong with the paths provided...")
+    for _, dest_path in pages:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    options = {
+        "template": load_template(template_path, basepath, assets, images),
+        "stream": stream,
+        "profile": profiler.enabled,
+        "page_options": page_options,
+    }
+    if read_ahead and jobs == 1 and not stream:
+        return generate_pages_pipelined(
+            pages, options["template"], template_path, read_ahead, profiler, link_graph=link_graph, **page_options
+        )
+    page_jobs = [(options, from_path, dest_path) for from_path, dest_path in pages]
+    failures = []
+    executor = None
+    if jobs > 1 and len(page_jobs) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        chunksize = max(1, len(page_jobs) // (jobs * 4))
+        results = executor.map(generate_page_job, page_jobs, chunksize=chunksize)
+    else:
+        results = map(generate_page_job, page_jobs)
+    minified = {}
+    try:
+        for (from_path, dest_path), (error, records, saved, links) in zip(pages, results):
+            print(f"Generating page from {from_path} to {dest_path} using template: {template_path}")
+            profiler.add(records)
+            if error is not None:
+                print(f"Failed to generate page from {from_path}: {error}")
+                failures.append(from_path)
+                continue
+            if link_graph is not None:
+                link_graph[dest_path] = links
+            if saved is not None:
+                print(f"Minified {dest_path}: saved {saved} bytes")
+                minified[dest_path] = saved
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    report_minified(minified)
+    return failures
+
+def check_failures(failures):
+    if failures:
+        raise ValueError(f"Failed to generate {len(failures)} page(s): {', '.join(failures)}")
+
+def generate_site(dir_path_content, template_path, dest_dir_path, basepath, jobs=1, profiler=null_profiler, **page_options):
+    if not os.path.exists(dir_path_content) or not os.path.exists(dest_dir_path):
+        raise FileNotFoundError("Something's wrong with the paths provided...")
+    with profiler.stage("walk"):
+        pages = collect_pages(dir_path_content, dest_dir_path)
+    check_failures(generate_pages(pages, template_path, basepath, jobs, profiler, **page_options))
+
+def generate_pages_incremental(
+    dir_path_content, template_path, dest_dir_path, basepath, manifest, jobs=1, profiler=null_profiler, assets=None,
+    images=None, link_graph=None, **page_options
+):
+    if not os.path.exists(dir_path_content) or not os.path.exists(template_path) or not os.path.exists(dest_dir_path):
+        raise FileNotFoundError("Something's wrong with the paths provided...")
+    template_hash = file_hash(template_path)
+    assets = assets or {}
+    rebuild_all = (
+        manifest["template_hash"] != template_hash or
+        manifest["basepath"] != basepath or
+        manifest.get("assets", {}) != assets or
+        manifest.get("images") != images or
+        manifest.get("minify", False) != page_options.get("minify", False)
+    )
+    old_pages = manifest["pages"]
+    new_pages = {}
+    pages = []
+    with profiler.stage("walk"):
+        all_pages = collect_pages(dir_path_content, dest_dir_path)
+    for source_path, dest_path in all_pages:
+        stat = os.stat(source_path)
+        entry = old_pages.get(source_path)
+        up_to_date = (
+            not rebuild_all and
+            entry is not None and
+            entry["dest"] == dest_path and
+            "links" in entry and
+            os.path.exists(dest_path)
+        )
+        if up_to_date and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            new_pages[source_path] = entry
+            continue
+        content_hash = file_hash(source_path)
+        if not up_to_date or entry["hash"] != content_hash:
+            pages.append((source_path, dest_path))
+        new_pages[source_path] = {
+            "hash": content_hash,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "dest": dest_path,
+        }
+        if up_to_date and entry["hash"] == content_hash:
+            # Unchanged pages keep the links recorded when they were last rendered.
+            new_pages[source_path].update(links=entry["links"], ids=entry["ids"])
+    page_links = {}
+    failures = generate_pages(
+        pages, template_path, basepath, jobs, profiler, assets=assets, images=images, link_graph=page_links,
+        **page_options
+    )
+    failed = set(failures)
+    for source_path in failed:
+        del new_pages[source_path]
+    for entry in new_pages.values():
+        entry.update(page_links.get(entry["dest"], {}))
+        if link_graph is not None:
+            link_graph[entry["dest"]] = {"links": entry["links"], "ids": entry["ids"]}
+    removed = 0
+    new_dest_paths = {entry["dest"] for entry in new_pages.values()}
+    for source_path, entry in old_pages.items():
+        if source_path in failed or source_path in new_pages or entry["dest"] in new_dest_paths:
+            continue
+        remove_file(entry["dest"], dest_dir_path)
+        removed += 1
+    manifest["template_hash"] = template_hash
+    manifest["basepath"] = basepath
+    manifest["assets"] = assets
+    manifest["images"] = images
+    manifest["minify"] = page_options.get("minify", False)
+    manifest["pages"] = new_pages
+    print(f"Generated {len(pages) - len(failures)} of {len(new_pages) + len(failures)} pages, removed {removed} stale pages.")
+    check_failures(failures)
@@ -0,0 +1,143 @@
+import re
+from functools import lru_cache
+from html import escape
+
+memo_size = 4096
+language_aliases = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "mjs": "javascript",
+    "ts": "javascript",
+    "typescript": "javascript",
+    "golang": "go",
+    "sh": "bash",
+    "shell": "bash",
+    "console": "bash",
+    "xml": "html",
+    "htm": "html",
+}
+
+double_quoted = r'"(?:[^"\\\n]|\\.)*"'
+single_quoted = r"'(?:[^'\\\n]|\\.)*'"
+# An info string that is not a single word is only taken as a language when it starts with a known one.
+language_token = re.compile(r"[\w+#.-]+")
+number = r"\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+
+
+def words(*names):
+    return r"\b(?:" + "|".join(names) + r")\b"
+
+def lexer(*rules):
+    # One alternation per language; the matching group tells the token class.
+    pattern = "|".join(f"({rule})" for _, rule in rules)
+    return re.compile(pattern, re.M), [token for token, _ in rules]
+
+
+lexers = {
+    "python": lexer(
+        ("c", r"#.*"),
+        ("s", r'[rbfuRBFU]{0,2}(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\')'),
+        ("s", rf"[rbfuRBFU]{{0,2}}(?:{double_quoted}|{single_quoted})"),
+        ("k", words(
+            "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif", "else",
+            "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not",
+            "or", "pass", "raise", "return", "try", "while", "with", "yield", "None", "True", "False",
+        )),
+        ("nb", words(
+            "print", "len", "range", "open", "dict", "list", "set", "tuple", "str", "int", "float", "bool",
+            "isinstance", "super", "self", "enumerate", "zip", "map", "sorted",
+        )),
+        ("nd", r"@[\w.]+"),
+        ("m", number),
+    ),
+    "javascript": lexer(
+        ("c", r"//.*|/\*[\s\S]*?\*/"),
+        ("s", rf"{double_quoted}|{single_quoted}|`(?:[^`\\]|\\.)*`"),
+        ("k", words(
+            "async", "await", "break", "case", "catch", "class", "const", "continue", "default", "delete", "do",
+            "else", "export", "extends", "finally", "for", "from", "function", "if", "import", "in", "instanceof",
+            "let", "new", "of", "return", "switch", "this", "throw", "try", "typeof", "var", "void", "while",
+            "yield", "null", "undefined", "true", "false",
+        )),
+        ("nb", words("console", "document", "window", "Array", "Object", "Promise", "JSON", "Math", "String")),
+        ("m", number),
+    ),
+    "go": lexer(
+        ("c", r"//.*|/\*[\s\S]*?\*/"),
+        ("s", rf"{double_quoted}|`[^`]*`|{single_quoted}"),
+        ("k", words(
+            "break", "case", "chan", "const", "continue", "default", "defer", "else", "fallthrough", "for", "func",
+            "go", "goto", "if", "import", "interface", "map", "package", "range", "return", "select", "struct",
+            "switch", "type", "var", "nil", "true", "false",
+        )),
+        ("nb", words(
+            "append", "cap", "len", "make", "new", "panic", "recover", "print", "println", "string", "int", "bool",
+            "byte", "rune", "error", "float64", "int64", "uint",
+        )),
+        ("m", number),
+    ),
+    "bash": lexer(
+        ("c", r"(?:^|(?<=\s))#.*"),
+        ("s", rf"{double_quoted}|'[^']*'"),
+        ("k", words(
+            "if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+            "function", "return", "export", "local",
+        )),
+        ("nb", words("echo", "cd", "set", "source", "exit", "read", "printf", "test")),
+        ("nv", r"\$\{[^}]*\}|\$\w+"),
+        ("m", number),
+    ),
+    "json": lexer(
+        ("na", rf"{double_quoted}(?=\s*:)"),
+        ("s", double_quoted),
+        ("k", words("true", "false", "null")),
+        ("m", r"-?" + number),
+    ),
+    "css": lexer(
+        ("c", r"/\*[\s\S]*?\*/"),
+        ("s", rf"{double_quoted}|{single_quoted}"),
+        ("na", r"[\w-]+(?=\s*:[^;{}]*[;}])"),
+        ("nt", r"[.#]?[\w-]+(?=[^{};]*\{)"),
+        ("m", r"#[\da-fA-F]{3,8}\b|-?\d*\.?\d+(?:%|[a-z]+)?"),
+    ),
+    "html": lexer(
+        ("c", r"<!--[\s\S]*?-->"),
+        ("nt", r"</?[\w:-]+|/?>"),
+        ("na", r"[\w:-]+(?==)"),
+        ("s", rf"{double_quoted}|{single_quoted}"),
+    ),
+}
+
+
+def highlight_language(info):
+    info = info.strip()
+    language = info.split(" ", 1)[0].lower()
+    language = language_aliases.get(language, language)
+    if language not in lexers and not language_token.fullmatch(info):
+        return ""
+    return language
+
+def tokenize(language, code):
+    pattern, tokens = lexers[language]
+    position = 0
+    for match in pattern.finditer(code):
+        if match.start() > position:
+            yield None, code[position:match.start()]
+        yield tokens[match.lastindex - 1], match.group()
+        position = match.end()
+    if position < len(code):
+        yield None, code[position:]
+
+@lru_cache(maxsize=memo_size)
+def highlight(language, code):
+    # Identical snippets are common across pages; they are tokenized once per process.
+    if language not in lexers:
+        return escape(code, quote=False)
+    parts = []
+    for token, text in tokenize(language, code):
+        if token is None:
+            parts.append(escape(text, quote=False))
+        else:
+            parts.append(f'<span class="{token}">{escape(text, quote=False)}</span>')
+    return "".join(parts)
@@ -1,45 +1,62 @@
+from io import StringIO
+from types import MappingProxyType
+
+# Shared, immutable defaults so nodes never alias a mutable [] or {}.
+no_children = ()
+no_props = MappingProxyType({})
+
+
 class HTMLNode:
-    def __init__(self, tag=None, value=None, children=[], props={}):
+    __slots__ = ("tag", "value", "children", "props")
+
+    def __init__(self, tag=None, value=None, children=no_children, props=no_props):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
     
     def to_html(self):
+        out = StringIO()
+        self.write_html(out)
+        return out.getvalue()
+    
+    def write_html(self, out):
         raise NotImplementedError("Method isn't implemented yet. Please implement this method.")
     
     def props_to_html(self):
-        result = ""
-        for k, v in self.props.items():
-            result += f" {k}=\"{v}\""
-        return result
+        return "".join(f" {k}=\"{v}\"" for k, v in self.props.items())
     
     def __repr__(self):
         return f"tag: {self.tag}\nvalue: {self.value}\nchildren: {self.children}\nprops: {self.props_to_html()}\n"
 
 
 class LeafNode(HTMLNode):
-    def __init__(self, tag=None, value=None, props={}):
+    __slots__ = ()
+
+    def __init__(self, tag=None, value=None, props=no_props):
         super().__init__(tag, value, props=props)
     
-    def to_html(self):
+    def write_html(self, out):
         if self.value is None:
             raise ValueError("All leaf nodes require a value!")
         if not self.tag:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            out.write(self.value)
+            return
+        out.write(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
 
 
 class ParentNode(HTMLNode):
-    def __init__(self, tag, children, props={}):
+    __slots__ = ()
+
+    def __init__(self, tag, children, props=no_props):
         super().__init__(tag=tag, children=children, props=props)
     
-    def to_html(self):
+    def write_html(self, out):
         if not self.tag:
             raise ValueError("Parent node must have a tag.")
         if not self.children:
             raise ValueError("Parent node requires children!")
-        children_html = ""
+        out.write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child.write_html(out)
+        out.write(f"</{self.tag}>")
@@ -0,0 +1,129 @@
+import json
+import os
+import struct
+from manifest import file_hash
+from pipeline import atomic_write
+
+image_extensions = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+image_cache_version = 1
+default_eager_images = 2
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames.
+jpeg_frame_markers = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+jpeg_standalone_markers = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def png_size(f, header):
+    if header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def gif_size(f, header):
+    return struct.unpack("<HH", header[6:10])
+
+def webp_size(f, header):
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        data = header[26:30]
+        if len(data) < 4:
+            return None
+        width, height = struct.unpack("<HH", data)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        if len(header) < 25 or header[20] != 0x2F:
+            return None
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        if len(header) < 30:
+            return None
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return None
+
+def jpeg_size(f, header):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in jpeg_standalone_markers:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in jpeg_frame_markers:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def image_size(path):
+    with open(path, "rb") as f:
+        header = f.read(32)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and len(header) >= 24:
+            return png_size(f, header)
+        if header[:6] in (b"GIF87a", b"GIF89a") and len(header) >= 10:
+            return gif_size(f, header)
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return webp_size(f, header)
+        if header[:2] == b"\xff\xd8":
+            return jpeg_size(f, header)
+    return None
+
+
+class ImageSizeCache:
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.sizes = {}
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if isinstance(cache, dict) and cache.get("version") == image_cache_version:
+            self.files = cache["files"]
+            self.sizes = cache["sizes"]
+
+    def size(self, path):
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": file_hash(path)}
+            self.files[path] = entry
+        if entry["hash"] not in self.sizes:
+            size = image_size(path)
+            self.sizes[entry["hash"]] = list(size) if size else None
+        return self.sizes[entry["hash"]]
+
+    def scan(self, source):
+        sizes = {}
+        seen = set()
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(image_extensions):
+                    continue
+                path = os.path.join(root, name)
+                seen.add(path)
+                size = self.size(path)
+                if size is not None:
+                    sizes[os.path.relpath(path, source).replace(os.sep, "/")] = size
+        self.files = {path: entry for path, entry in self.files.items() if path in seen}
+        return sizes
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        hashes = {entry["hash"] for entry in self.files.values()}
+        self.sizes = {key: size for key, size in self.sizes.items() if key in hashes}
+        cache = {"version": image_cache_version, "files": self.files, "sizes": self.sizes}
+        atomic_write(self.path, json.dumps(cache))
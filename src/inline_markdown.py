@@ -32,82 +32,89 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             new_nodes.append(new_node)
     return new_nodes
 
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+link_pattern = re.compile(r"\[(.*?)\]\((.*?)\)")
+delimiters = ("**", "_", "`")
+delimiter_text_types = (text_type_bold, text_type_italic, text_type_code)
+
 def extract_markdown_images(text):
-    regex = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(regex, text)
-    return matches
+    return image_pattern.findall(text)
 
 def extract_markdown_links(text):
-    regex = r"\[(.*?)\]\((.*?)\)"
-    matches = re.findall(regex, text)
-    return matches
+    return link_pattern.findall(text)
 
-def split_nodes_helper(old_nodes, text_type, func):
+def split_nodes_helper(old_nodes, text_type, pattern):
     if not old_nodes:
         return []
-    exclamation_point = "!"
-    if text_type == text_type_link:
-        exclamation_point = ""
     new_nodes = []
     for node in old_nodes:
         if node.text_type != text_type_text:
             new_nodes.append(node)
             continue
         old_text = node.text
-        images_or_links = func(old_text)
-        if len(images_or_links) == 0:
+        position = 0
+        for match in pattern.finditer(old_text):
+            if match.start() > position:
+                new_nodes.append(TextNode(old_text[position:match.start()], text_type_text))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+        if position == 0:
             new_nodes.append(node)
-            continue
-        for image_or_link in images_or_links:
-            text_list = old_text.split(f"{exclamation_point}[{image_or_link[0]}]({image_or_link[1]})", 1)
-            if len(text_list) != 2:
-                raise SyntaxError("Invalid markdown. Image text not closed.")
-            if text_list[0] != "":
-                new_nodes.append(
-                    TextNode(
-                        text_list[0],
-                        text_type_text
-                    )
-                )
-            new_nodes.append(
-                TextNode(
-                    image_or_link[0],
-                    text_type,
-                    image_or_link[1]
-                )
-            )
-            old_text = text_list[1]
-        if old_text != "":
-            new_nodes.append(
-                TextNode(
-                    old_text,
-                    text_type_text
-                )
-            )
+        elif position < len(old_text):
+            new_nodes.append(TextNode(old_text[position:], text_type_text))
     return new_nodes
 
 def split_nodes_image(old_nodes):
-    return split_nodes_helper(old_nodes, text_type_image, extract_markdown_images)
+    return split_nodes_helper(old_nodes, text_type_image, image_pattern)
 
 def split_nodes_link(old_nodes):
-    return split_nodes_helper(old_nodes, text_type_link, extract_markdown_links)
+    return split_nodes_helper(old_nodes, text_type_link, link_pattern)
+
+def check_delimiters_closed(text, level):
+    for delimiter in delimiters[level:]:
+        if delimiter in text and text.count(delimiter) % 2 == 1:
+            raise SyntaxError(f"Invalid syntax for markdown text: missing closing {delimiter}.")
+
+def split_delimiters(text, nodes, level=0):
+    # Same precedence as the chained split_nodes_delimiter passes: ** first,
+    # then _ between the bold spans, then ` between the italic spans.
+    for level in range(level, len(delimiters)):
+        delimiter = delimiters[level]
+        if delimiter in text:
+            break
+    else:
+        nodes.append(TextNode(text, text_type_text))
+        return
+    parts = text.split(delimiter)
+    if len(parts) % 2 == 0:
+        raise SyntaxError(f"Invalid syntax for markdown text: missing closing {delimiter}.")
+    for i, part in enumerate(parts):
+        if not part:
+            continue
+        if i % 2 == 0:
+            split_delimiters(part, nodes, level + 1)
+            continue
+        check_delimiters_closed(part, level + 1)
+        nodes.append(TextNode(part, delimiter_text_types[level]))
+
+def split_links_and_delimiters(text, start, end, nodes):
+    position = start
+    for match in link_pattern.finditer(text, start, end):
+        if match.start() > position:
+            split_delimiters(text[position:match.start()], nodes)
+        check_delimiters_closed(match.group(1), 0)
+        nodes.append(TextNode(match.group(1), text_type_link, match.group(2)))
+        position = match.end()
+    if end > position:
+        split_delimiters(text[position:end], nodes)
 
 def text_to_textnodes(text):
     nodes = []
-    if text:
-        nodes = [TextNode(text, text_type_text)]
-    return split_nodes_delimiter(
-                                split_nodes_delimiter(
-                                    split_nodes_delimiter(
-                                        split_nodes_link(
-                                            split_nodes_image(nodes)
-                                        ),
-                                        "**",
-                                        text_type_bold
-                                    ),
-                                    "_",
-                                    text_type_italic
-                                ),
-                                "`",
-                                text_type_code
-                            )
+    position = 0
+    for match in image_pattern.finditer(text):
+        split_links_and_delimiters(text, position, match.start(), nodes)
+        check_delimiters_closed(match.group(1), 0)
+        nodes.append(TextNode(match.group(1), text_type_image, match.group(2)))
+        position = match.end()
+    split_links_and_delimiters(text, position, len(text), nodes)
+    return nodes
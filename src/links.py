@@ -0,0 +1,83 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+# Fragments browsers resolve without a matching id.
+implicit_anchors = ("", "top")
+
+
+def output_path(dest_path, dest_dir_path):
+    return os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+
+def resolve_link(url, page, basepath):
+    # Returns (output path, fragment) for links into the site, None for anything else.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    path = unquote(parts.path)
+    if not path:
+        return page, parts.fragment
+    if path.startswith("/"):
+        if not path.startswith(basepath):
+            return None
+        path = path[len(basepath):]
+    else:
+        path = posixpath.join(posixpath.dirname(page), path)
+    is_directory = path == "" or path.endswith("/")
+    path = posixpath.normpath(path) if path else ""
+    if path == ".":
+        path = ""
+    if is_directory:
+        path = posixpath.join(path, "index.html")
+    return path, parts.fragment
+
+def find_output(path, outputs):
+    # Servers map /page to page/index.html or page.html.
+    for candidate in (path, f"{path}/index.html", f"{path}.html"):
+        if candidate in outputs:
+            return candidate
+    return None
+
+def check_links(link_graph, dest_dir_path, static_paths, basepath, template_links=(), template_ids=()):
+    pages = {output_path(dest_path, dest_dir_path): graph for dest_path, graph in link_graph.items()}
+    outputs = set(pages).union(path.replace(os.sep, "/") for path in static_paths)
+    page_ids = {}
+    # The same links appear on many pages; relative ones only resolve the same within a directory.
+    resolved = {}
+    checked = 0
+    broken = []
+    for page, graph in sorted(pages.items()):
+        directory = posixpath.dirname(page) + "/"
+        for url in [*template_links, *graph["links"]]:
+            if url.startswith("/"):
+                key = url
+            else:
+                key = (page if url[:1] in ("", "#", "?") else directory, url)
+            if key not in resolved:
+                target = resolve_link(url, page, basepath)
+                if target is not None:
+                    target = find_output(target[0], outputs), target[1]
+                resolved[key] = target
+            target = resolved[key]
+            if target is None:
+                continue
+            checked += 1
+            target_page, fragment = target
+            if target_page is None:
+                broken.append((page, url, "missing target"))
+                continue
+            if fragment in implicit_anchors or target_page not in pages:
+                continue
+            if target_page not in page_ids:
+                page_ids[target_page] = set(pages[target_page]["ids"]).union(template_ids)
+            if fragment not in page_ids[target_page]:
+                broken.append((page, url, "missing anchor"))
+    return checked, broken
+
+def report_links(checked, broken):
+    if not broken:
+        print(f"Checked {checked} internal links, all resolve.")
+        return
+    print(f"Found {len(broken)} broken internal links out of {checked}:")
+    for page, url, reason in broken:
+        print(f"  {page}: {url} ({reason})")
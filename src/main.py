@@ -1,34 +1,418 @@
+import argparse
 import sys
-from copy_static import copy_dir
-from generate_content import generate_pages_recursive
+import time
+from block_cache import BlockCache
+from compress import compress_dir
+from copy_static import FileHashCache, asset_names, static_outputs, sync_dir, link_modes
+from generate_content import check_failures, collect_pages, generate_pages, generate_site, generate_pages_incremental
+from images import ImageSizeCache, default_eager_images
+from links import check_links, report_links
+from manifest import file_hash, load_manifest, save_manifest
+from metadata import MetadataIndex
+from pipeline import default_read_ahead
+from profiler import Profiler, null_profiler
+from search_index import build_search_index, load_search_state, save_search_state
+from shard import check_conflicts, load_shard_manifests, merge_shards, parse_shard, shard_name, shard_pages, write_shard_manifest
+from template import load_template
+from watch import watch
 
 import os, shutil
 
 dir_path_static = "static"
 dir_path_docs = "docs"
 dir_path_content = "content"
+dir_path_cache = ".cache"
+dir_path_shards = "shards"
 template_path = "template.html"
+manifest_path = os.path.join(dir_path_cache, "manifest.json")
+block_cache_path = os.path.join(dir_path_cache, "blocks.sqlite")
+dir_path_search = os.path.join(dir_path_docs, "search")
+search_state_path = os.path.join(dir_path_cache, "search.json")
+metadata_index_path = os.path.join(dir_path_cache, "metadata.json")
+image_cache_path = os.path.join(dir_path_cache, "images.json")
+asset_cache_path = os.path.join(dir_path_cache, "assets.json")
 
 
-def main():
-    basepath = "/"
-    if len(sys.argv) == 2:
-        basepath = sys.argv[1]
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py", description="Static site generator")
+    parser.add_argument("basepath", nargs="?", default="/", help="Path prefix for site-absolute links")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Only regenerate pages whose inputs changed since the last build (state kept in {manifest_path})",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to render pages (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--link",
+        choices=link_modes,
+        default="copy",
+        help="How static files are placed in the output: copied, hardlinked or reflinked (falls back to copying)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Convert and write pages block by block so memory is bounded by the largest block",
+    )
+    parser.add_argument(
+        "--pipeline",
+        nargs="?",
+        type=int,
+        const=default_read_ahead,
+        default=0,
+        metavar="N",
+        help=(
+            "Overlap reading, rendering and writing: read up to N pages ahead on a thread pool and write "
+            f"through a background queue (default N: {default_read_ahead}; single-process builds only)"
+        ),
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Collapse whitespace, drop comments and optional attribute quotes in generated pages (keeps <pre> and <code>)",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Write precompressed .gz (and .br when brotli is installed) siblings for text outputs",
+    )
+    parser.add_argument(
+        "--compress-threshold",
+        type=int,
+        default=1024,
+        help="Minimum file size in bytes for --compress",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="Copy static files as name.<hash>.ext and rewrite page references to them",
+    )
+    parser.add_argument(
+        "--image-hints",
+        action="store_true",
+        help="Add width/height from the image headers under static/ and lazy-load images below the fold",
+    )
+    parser.add_argument(
+        "--eager-images",
+        type=int,
+        default=default_eager_images,
+        help="Number of images at the top of each page that stay eagerly loaded with --image-hints",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=f"Write a client-side search index sharded by term prefix to {dir_path_search}",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_argument,
+        metavar="K/N",
+        help=(
+            f"Render only shard K of N of the content into {dir_path_shards}/K-of-N/ with a shard manifest; "
+            "combine the shards with the merge command"
+        ),
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=dir_path_shards,
+        help="Directory holding shard outputs for --shard",
+    )
+    parser.add_argument(
+        "--strict-links",
+        action="store_true",
+        help="Fail the build when an internal link or anchor does not resolve to a generated page or static file",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help=f"Reuse rendered HTML of unchanged blocks across pages and builds (stored in {block_cache_path})",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=256,
+        help="Size limit in MB for --block-cache; least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record wall time per build stage and page and print a timing report",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="Number of slowest pages listed by --profile",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write a Chrome trace-event JSON file of the build stages (implies --profile)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild incrementally whenever content, static files or the template change",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.05,
+        help="Polling interval in seconds for --watch",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.trace:
+        args.profile = True
+    if args.shard:
+        for option in ("incremental", "watch", "search", "compress"):
+            if getattr(args, option):
+                parser.error(f"--{option} is not supported with --shard")
+    return args
+
+def shard_argument(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_merge_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py merge", description=f"Combine the outputs of --shard builds into {dir_path_docs}"
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=dir_path_shards,
+        help="Directory holding the shard outputs and manifests",
+    )
+    parser.add_argument(
+        "--link",
+        choices=link_modes,
+        default="copy",
+        help="How shard pages and static files are placed in the output",
+    )
+    parser.add_argument(
+        "--strict-links",
+        action="store_true",
+        help="Fail the merge when an internal link or anchor does not resolve",
+    )
+    return parser.parse_args(argv)
+
+def page_options(args, memory_cache=None):
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache(block_cache_path, args.block_cache_size * 1024 * 1024)
+    elif args.jobs == 1:
+        # Worker processes would each get a copy, so a memory cache only serves single-process builds.
+        block_cache = memory_cache
+    return {"stream": args.stream, "read_ahead": args.pipeline, "block_cache": block_cache, "minify": args.minify}
+
+def build_search(args, profiler=null_profiler):
+    with profiler.stage("search index"):
+        state = load_search_state(search_state_path, args.basepath)
+        build_search_index(state, collect_pages(dir_path_content, dir_path_docs), dir_path_docs, dir_path_search)
+        save_search_state(search_state_path, state)
+
+def fingerprint_names(args):
+    if not args.fingerprint:
+        return None
+    hash_cache = FileHashCache(asset_cache_path)
+    names = asset_names(dir_path_static, hash_cache)
+    hash_cache.save()
+    return names
+
+def image_hints(args):
+    if not args.image_hints:
+        return None
+    image_cache = ImageSizeCache(image_cache_path)
+    sizes = image_cache.scan(dir_path_static)
+    image_cache.save()
+    return {"eager": args.eager_images, "sizes": sizes}
+
+def check_site_links(args, link_graph, static_paths, assets, profiler=null_profiler, basepath=None):
+    basepath = basepath or args.basepath
+    with profiler.stage("links"):
+        template = load_template(template_path, basepath, assets)
+        checked, broken = check_links(link_graph, dir_path_docs, static_paths, basepath, template.links, template.ids)
+    report_links(checked, broken)
+    if broken and args.strict_links:
+        raise ValueError(f"Found {len(broken)} broken internal link(s).")
+
+def update_metadata_index(profiler=null_profiler):
+    with profiler.stage("metadata"):
+        metadata_index = MetadataIndex(metadata_index_path)
+        metadata_index.update(source_path for source_path, _ in collect_pages(dir_path_content, dir_path_docs))
+        metadata_index.save()
+
+def build_incremental(args, profiler=null_profiler, memory_cache=None):
+    os.makedirs(dir_path_docs, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    with profiler.stage("static copy"):
+        assets = fingerprint_names(args)
+        manifest["static"] = sync_dir(dir_path_static, dir_path_docs, manifest["static"], args.link, assets)
+        images = image_hints(args)
+    options = page_options(args, memory_cache)
+    link_graph = {}
+    try:
+        generate_pages_incremental(
+            dir_path_content, template_path, dir_path_docs, args.basepath, manifest, args.jobs, profiler, assets,
+            images, link_graph, **options
+        )
+        check_site_links(args, link_graph, manifest["static"], assets, profiler)
+        update_metadata_index(profiler)
+        if args.search:
+            build_search(args, profiler)
+        if args.compress:
+            with profiler.stage("compress"):
+                manifest["compressed"] = compress_dir(
+                    dir_path_docs, manifest["compressed"], args.compress_threshold, args.jobs
+                )
+    finally:
+        save_manifest(manifest_path, manifest)
+        if options["block_cache"] is not None:
+            options["block_cache"].prune()
+            options["block_cache"].close()
+
+def build(args, profiler=null_profiler, memory_cache=None):
+    # The incremental manifest describes the docs/ about to be replaced.
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
     if os.path.exists(dir_path_docs):
         shutil.rmtree(dir_path_docs)
+    with profiler.stage("static copy"):
+        assets = fingerprint_names(args)
+        static_paths = sync_dir(dir_path_static, dir_path_docs, link_mode=args.link, names=assets)
+        images = image_hints(args)
+    options = page_options(args, memory_cache)
+    link_graph = {}
+    try:
+        generate_site(
+            dir_path_content, template_path, dir_path_docs, args.basepath, args.jobs, profiler, assets=assets,
+            images=images, link_graph=link_graph, **options
+        )
+    finally:
+        if options["block_cache"] is not None:
+            options["block_cache"].prune()
+            options["block_cache"].close()
+    check_site_links(args, link_graph, static_paths, assets, profiler)
+    update_metadata_index(profiler)
+    if args.search:
+        build_search(args, profiler)
+    if args.compress:
+        with profiler.stage("compress"):
+            compress_dir(dir_path_docs, threshold=args.compress_threshold, jobs=args.jobs)
+
+def build_shard(args, profiler=null_profiler, memory_cache=None):
+    shard, shards = args.shard
+    shard_dir = os.path.join(args.shard_dir, shard_name(shard, shards))
+    if os.path.exists(shard_dir):
+        shutil.rmtree(shard_dir)
+    os.makedirs(shard_dir)
+    with profiler.stage("walk"):
+        all_pages = collect_pages(dir_path_content, shard_dir)
+        pages, partition = shard_pages(all_pages, dir_path_content, shard, shards)
+    assets = fingerprint_names(args)
+    images = image_hints(args)
+    options = page_options(args, memory_cache)
+    link_graph = {}
+    try:
+        failures = generate_pages(
+            pages, template_path, args.basepath, args.jobs, profiler, assets=assets, images=images,
+            link_graph=link_graph, **options
+        )
+    finally:
+        if options["block_cache"] is not None:
+            options["block_cache"].prune()
+            options["block_cache"].close()
+    check_failures(failures)
+    write_shard_manifest(
+        shard_dir + ".json", shard, shards, partition, args.basepath, file_hash(template_path), assets, pages,
+        shard_dir, link_graph
+    )
+    print(f"Rendered {len(pages)} of {len(all_pages)} pages as shard {shard}/{shards} into {shard_dir}")
+
+def merge(args):
+    manifests = load_shard_manifests(args.shard_dir)
+    assets = manifests[0]["assets"] or None
+    # The previous site stays in place unless the shards can be merged.
+    check_conflicts(manifests, static_outputs(dir_path_static, assets))
+    if os.path.exists(dir_path_docs):
+        shutil.rmtree(dir_path_docs)
+    static_paths = sync_dir(dir_path_static, dir_path_docs, link_mode=args.link, names=assets)
+    link_graph = merge_shards(manifests, args.shard_dir, dir_path_docs, static_paths, args.link)
+    check_site_links(args, link_graph, static_paths, assets, basepath=manifests[0]["basepath"])
+
+def report_profile(args, profiler):
+    if not profiler.enabled:
+        return
+    profiler.report(args.profile_top)
+    if args.trace:
+        profiler.write_trace(args.trace)
+        print(f"Wrote trace to {args.trace}")
+
+def watch_and_build(args, on_build=None):
+    def rebuild(changed):
+        print(f"Detected changes in {', '.join(changed)}")
+        start = time.perf_counter()
+        try:
+            build_incremental(args)
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
+            return
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+        if on_build is not None:
+            on_build(changed)
+
+    print(f"Watching {dir_path_content}, {dir_path_static} and {template_path} for changes...")
+    watch([dir_path_content, dir_path_static, template_path], rebuild, args.interval)
+
+def run(argv, memory_cache=None):
+    if argv[:1] == ["merge"]:
+        try:
+            merge(parse_merge_args(argv[1:]))
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
+            return 1
+        return 0
+    args = parse_args(argv)
     if not os.path.exists(dir_path_static):
         print("Missing static directory... Aborting.")
-        exit(1)
-    copy_dir(dir_path_static, dir_path_docs)
+        return 1
+    profiler = Profiler() if args.profile else null_profiler
     try:
-        generate_pages_recursive(dir_path_content, template_path, dir_path_docs, basepath)
+        if args.shard:
+            build_shard(args, profiler, memory_cache)
+        elif args.incremental or args.watch:
+            build_incremental(args, profiler, memory_cache)
+        else:
+            build(args, profiler, memory_cache)
     except FileNotFoundError:
         print("Missing file or directory")
-        exit(1)
+        return 1
     except ValueError as e:
         print(e)
-        exit(1)
+        if not args.watch:
+            return 1
+    finally:
+        report_profile(args, profiler)
+    if args.watch:
+        try:
+            watch_and_build(args)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+def main():
+    status = run(sys.argv[1:])
+    if status:
+        exit(status)
 
 if __name__ == "__main__":
     main()
-
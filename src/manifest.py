@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+
+manifest_version = 2
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def new_manifest():
+    return {
+        "version": manifest_version,
+        "template_hash": None,
+        "basepath": None,
+        "pages": {},
+        "static": [],
+        "assets": {},
+        "compressed": {},
+    }
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != manifest_version:
+        return new_manifest()
+    # Keys added without a version bump start out empty.
+    for key, value in new_manifest().items():
+        manifest.setdefault(key, value)
+    return manifest
+
+def save_manifest(path, manifest):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -1,13 +1,17 @@
+import json
+
 from textnode import (
     TextNode,
     text_node_to_html_node,
     text_type_code,
 )
 
-from htmlnode import ParentNode
+from htmlnode import LeafNode, ParentNode
 
 from inline_markdown import text_to_textnodes
 
+from highlight import highlight, highlight_language
+
 block_type_p = "paragraph"
 block_type_h = "heading"
 block_type_c = "code"
@@ -16,6 +20,7 @@ block_type_ul = "unordered_list"
 block_type_ol = "ordered_list"
 
 heading_starts = ["#" * (i + 1) for i in range(6)]
+heading_tags = ("h1", "h2", "h3", "h4", "h5", "h6")
 
 def markdown_to_blocks(markdown):
     blocks = markdown.split("\n\n")
@@ -67,6 +72,12 @@ def get_children(text):
 def code_block_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("Invalid code block")
+    info, _, body = block[3:-3].partition("\n")
+    language = highlight_language(info)
+    if language and body:
+        # Fences with a language are highlighted at build time instead of in the browser.
+        code = LeafNode("code", highlight(language, body.strip("\n")), {"class": f"language-{language}"})
+        return ParentNode("pre", [code])
     code = block.strip("```").strip()
     children = get_children(code)
     return ParentNode("pre", children)
@@ -107,7 +118,7 @@ def heading_block_to_html_node(block):
     if text == "":
         raise ValueError("Invalid heading structure")
     children = get_children(text)
-    return ParentNode(f"h{level}", children)
+    return ParentNode(heading_tags[level - 1], children)
 
 def paragraph_block_to_html_node(block):
     paragraph = " ".join(block.split("\n"))
@@ -116,22 +127,73 @@ def paragraph_block_to_html_node(block):
     nodes = text_to_textnodes(paragraph)
     return ParentNode("p", [text_node_to_html_node(node) for node in nodes])
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    html_children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == block_type_c:
-            html_children.append(code_block_to_html_node(block))
-        elif block_type == block_type_q:
-            html_children.append(quote_block_to_html_node(block))
-        elif block_type == block_type_h:
-            html_children.append(heading_block_to_html_node(block))
-        elif block_type == block_type_p:
-            html_children.append(paragraph_block_to_html_node(block))
-        elif block_type == block_type_ol:
-            html_children.append(ParentNode("ol", list_block_to_list_items(block)))
+def iter_markdown_blocks(lines):
+    # Splits exactly like markdown_to_blocks, but only keeps the text since
+    # the last block boundary in memory.
+    pending = []
+    for line in lines:
+        pending.append(line)
+        if line != "\n":
+            continue
+        blocks = "".join(pending).split("\n\n")
+        pending = [blocks.pop()]
+        for block in blocks:
+            if block != "":
+                yield block.strip()
+    for block in "".join(pending).split("\n\n"):
+        if block != "":
+            yield block.strip()
+
+def block_to_html_node(block):
+    block_type = block_to_block_type(block)
+    if block_type == block_type_c:
+        return code_block_to_html_node(block)
+    if block_type == block_type_q:
+        return quote_block_to_html_node(block)
+    if block_type == block_type_h:
+        return heading_block_to_html_node(block)
+    if block_type == block_type_p:
+        return paragraph_block_to_html_node(block)
+    if block_type == block_type_ol:
+        return ParentNode("ol", list_block_to_list_items(block))
+    return ParentNode("ul", list_block_to_list_items(block))
+
+def cached_blocks_to_html_nodes(blocks, block_cache, rewriter=None):
+    namespace = rewriter.cache_key if rewriter is not None else ""
+    block_types = [block_to_block_type(block) for block in blocks]
+    keys = [block_cache.key(namespace, block_type, block) for block_type, block in zip(block_types, blocks)]
+    cached = block_cache.get_many(keys)
+    rendered = {}
+    children = []
+    for key, block_type, block in zip(keys, block_types, blocks):
+        # Output that depends on the block's position in the page is cached separately.
+        position = rewriter.position_key(block) if rewriter is not None else None
+        if position is not None:
+            key = block_cache.key(f"{namespace}:{position}", block_type, block)
+            value = block_cache.get_many([key]).get(key)
+        else:
+            value = cached.get(key, rendered.get(key))
+        if value is None:
+            node = block_to_html_node(block)
+            record = rewriter.rewrite_block(node) if rewriter is not None else {}
+            record["html"] = node.to_html()
+            rendered[key] = json.dumps(record)
         else:
-            html_children.append(ParentNode("ul", list_block_to_list_items(block)))
-    return ParentNode("div", html_children)
+            record = json.loads(value)
+            if rewriter is not None:
+                rewriter.replay_block(record)
+        children.append(LeafNode(None, record["html"]))
+    if rendered:
+        block_cache.put_many(rendered)
+    return children
+
+def blocks_to_html_node(blocks, block_cache=None, rewriter=None):
+    if block_cache is not None:
+        return ParentNode("div", cached_blocks_to_html_nodes(blocks, block_cache, rewriter))
+    node = ParentNode("div", [block_to_html_node(block) for block in blocks])
+    if rewriter is not None:
+        rewriter.rewrite_node_urls(node)
+    return node
 
+def markdown_to_html_node(markdown, block_cache=None):
+    return blocks_to_html_node(markdown_to_blocks(markdown), block_cache)
@@ -0,0 +1,92 @@
+import json
+import os
+from io import StringIO
+from itertools import chain
+from pipeline import atomic_write
+
+front_matter_delimiter = "---"
+metadata_index_version = 1
+
+
+def parse_front_matter(lines):
+    metadata = {}
+    for line in lines:
+        key, separator, value = line.partition(":")
+        key = key.strip().lower()
+        if not separator or not key or key.startswith("#"):
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        metadata[key] = value
+    return metadata
+
+def read_front_matter(markdown_file):
+    first_line = markdown_file.readline()
+    if first_line.strip() != front_matter_delimiter:
+        return {}, [first_line]
+    header = []
+    for line in markdown_file:
+        if line.strip() == front_matter_delimiter:
+            return parse_front_matter(header), []
+        header.append(line)
+    # An unclosed header is ordinary markdown.
+    return {}, [first_line, *header]
+
+def split_front_matter(markdown):
+    if not markdown.startswith(front_matter_delimiter):
+        return {}, markdown
+    markdown_file = StringIO(markdown)
+    metadata, pending = read_front_matter(markdown_file)
+    return metadata, "".join(pending) + markdown_file.read()
+
+def read_metadata(path):
+    with open(path) as markdown_file:
+        metadata, pending = read_front_matter(markdown_file)
+        if "title" in metadata:
+            return metadata
+        for line in chain(pending, markdown_file):
+            if line.startswith("# "):
+                metadata["title"] = line[2:].rstrip("\n")
+                break
+    return metadata
+
+
+class MetadataIndex:
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.changed = False
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if isinstance(index, dict) and index.get("version") == metadata_index_version:
+            self.pages = index["pages"]
+
+    def get(self, source_path):
+        stat = os.stat(source_path)
+        entry = self.pages.get(source_path)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["metadata"]
+        metadata = read_metadata(source_path)
+        self.pages[source_path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "metadata": metadata}
+        self.changed = True
+        return metadata
+
+    def update(self, source_paths):
+        metadata = {source_path: self.get(source_path) for source_path in source_paths}
+        for source_path in self.pages.keys() - metadata.keys():
+            del self.pages[source_path]
+            self.changed = True
+        return metadata
+
+    def save(self):
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(self.path, json.dumps({"version": metadata_index_version, "pages": self.pages}))
+        self.changed = False
@@ -0,0 +1,116 @@
+import re
+
+chunk_size = 16 * 1024
+# Content of these elements is copied as is.
+raw_tags = ("pre", "code", "textarea", "script", "style")
+# Whitespace next to these tags never renders, so it can be dropped.
+block_tags = (
+    "html", "head", "body", "title", "meta", "link", "script", "style", "div", "p", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "h5", "h6", "article", "section", "header", "footer", "nav", "main",
+    "blockquote", "pre", "table", "thead", "tbody", "tr", "td", "th", "hr",
+)
+block_names = frozenset(("!doctype",) + block_tags)
+tag_body = r"(?:[^>\"']|\"[^\"]*\"|'[^']*')*>"
+tag_pattern = re.compile(rf"(<[!/]?[A-Za-z]{tag_body})")
+tag_name_pattern = re.compile(r"(?:^|\0)</?(!?[A-Za-z][\w:-]*)")
+raw_start_pattern = re.compile(rf"<({'|'.join(raw_tags)})\b{tag_body}", re.I)
+comment_pattern = re.compile(r"<!--(?!\[if).*?-->", re.S)
+whitespace_pattern = re.compile(r"\s+")
+quoted_value_pattern = re.compile(r"(?<=[\w:-])=\"([^\s\"'=<>`]+)\"(?!/)")
+
+
+class MinifyingWriter:
+    def __init__(self, out):
+        self.out = out
+        self.pending = ""
+        self.buffer = []
+        self.buffered = 0
+        self.raw_end = None
+        self.after_block = True
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def saved(self):
+        return self.bytes_in - self.bytes_out
+
+    def emit(self, text):
+        if text:
+            self.bytes_out += len(text.encode())
+            self.out.write(text)
+
+    def write(self, text):
+        # Render output arrives in many tiny pieces; transform it in chunks.
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= chunk_size:
+            self.flush_buffer()
+            self.process(False)
+
+    def flush_buffer(self):
+        text = "".join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        self.bytes_in += len(text.encode())
+        self.pending += text
+
+    def close(self):
+        self.flush_buffer()
+        self.process(True)
+
+    def safe_cut(self, text):
+        # Only hand complete tags and comments to minify_region.
+        cut = text.rfind(">") + 1
+        comment = text.rfind("<!--", 0, cut)
+        if comment != -1 and text.find("-->", comment) == -1:
+            cut = text.rfind(">", 0, comment) + 1
+        return cut
+
+    def minify_region(self, region):
+        parts = tag_pattern.split(comment_pattern.sub("", region))
+        texts = whitespace_pattern.sub(" ", "\0".join(parts[0::2])).split("\0")
+        if self.after_block:
+            texts[0] = texts[0].lstrip(" ")
+        if len(parts) > 1:
+            # Work on all tags of the region at once; per-match callbacks are much slower.
+            tags = quoted_value_pattern.split("\0".join(parts[1::2]))
+            tags[1::2] = ["=" + value for value in tags[1::2]]
+            tags = "".join(tags)
+            for index, name in enumerate(tag_name_pattern.findall(tags)):
+                if name.lower() in block_names:
+                    texts[index] = texts[index].rstrip(" ")
+                    texts[index + 1] = texts[index + 1].lstrip(" ")
+                    self.after_block = True
+                else:
+                    self.after_block = False
+            parts[1::2] = tags.split("\0")
+        parts[0::2] = texts
+        if texts[-1]:
+            self.after_block = False
+        self.emit("".join(parts))
+
+    def process(self, final):
+        pending = self.pending
+        while pending:
+            if self.raw_end is not None:
+                end = pending.find(self.raw_end)
+                if end == -1:
+                    keep = len(pending) if final else max(0, len(pending) - len(self.raw_end) + 1)
+                    self.emit(pending[:keep])
+                    pending = pending[keep:]
+                    break
+                self.emit(pending[:end])
+                pending = pending[end:]
+                self.raw_end = None
+                continue
+            cut = len(pending) if final else self.safe_cut(pending)
+            raw = raw_start_pattern.search(pending, 0, cut)
+            if raw is not None:
+                cut = raw.end()
+            if cut == 0:
+                break
+            self.minify_region(pending[:cut])
+            pending = pending[cut:]
+            if raw is not None:
+                self.raw_end = f"</{raw.group(1)}"
+        self.pending = pending
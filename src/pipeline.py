@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from profiler import null_profiler
+
+default_read_ahead = 8
+
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+def atomic_write(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class BackgroundWriter:
+    def __init__(self, max_pending=default_read_ahead, profiler=null_profiler):
+        self.pending = queue.Queue(max_pending)
+        self.profiler = profiler
+        self.errors = []
+        self.done = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            source_path, dest_path, text = item
+            error = None
+            try:
+                with self.profiler.stage("write", source_path):
+                    atomic_write(dest_path, text)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self.errors.append((source_path, error))
+            self.done.put((source_path, error))
+
+    def put(self, source_path, dest_path, text):
+        # Blocks while max_pending pages are waiting, which bounds memory.
+        self.pending.put((source_path, dest_path, text))
+
+    def completed(self):
+        # Pages whose write has finished since the last call.
+        results = []
+        while True:
+            try:
+                results.append(self.done.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        return self.errors
+
+
+def pipelined(pages, render, read_ahead=default_read_ahead, profiler=null_profiler):
+    def read(source_path):
+        with profiler.stage("read", source_path):
+            return read_text(source_path)
+
+    writer = BackgroundWriter(read_ahead, profiler)
+    reads = deque()
+    pages = iter(pages)
+    try:
+        with ThreadPoolExecutor(max_workers=read_ahead) as readers:
+            for source_path, dest_path in pages:
+                reads.append((source_path, dest_path, readers.submit(read, source_path)))
+                if len(reads) >= read_ahead:
+                    break
+            while reads:
+                source_path, dest_path, future = reads.popleft()
+                for next_source, next_dest in pages:
+                    reads.append((next_source, next_dest, readers.submit(read, next_source)))
+                    break
+                try:
+                    text = render(source_path, future.result())
+                except Exception as e:
+                    yield source_path, f"{type(e).__name__}: {e}"
+                    continue
+                writer.put(source_path, dest_path, text)
+                yield from writer.completed()
+    finally:
+        writer.close()
+    yield from writer.completed()
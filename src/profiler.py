@@ -0,0 +1,83 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self):
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, page=None):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.records.append((name, page, start, time.perf_counter_ns() - start, os.getpid()))
+
+    def add(self, records):
+        self.records.extend(records)
+
+    def stage_totals(self):
+        totals = {}
+        for name, _, _, duration, _ in self.records:
+            calls, total = totals.get(name, (0, 0))
+            totals[name] = (calls + 1, total + duration)
+        return totals
+
+    def page_totals(self):
+        totals = {}
+        for _, page, _, duration, _ in self.records:
+            if page is not None:
+                totals[page] = totals.get(page, 0) + duration
+        return totals
+
+    def report(self, top=10):
+        print("Stage totals:")
+        print(f"  {'stage':16} {'calls':>8} {'total ms':>12}")
+        for name, (calls, total) in self.stage_totals().items():
+            print(f"  {name:16} {calls:8} {total / 1e6:12.2f}")
+        slowest = sorted(self.page_totals().items(), key=lambda item: item[1], reverse=True)[:top]
+        if slowest:
+            print(f"Slowest {len(slowest)} pages:")
+            for page, total in slowest:
+                print(f"  {total / 1e6:10.2f} ms  {page}")
+
+    def write_trace(self, path):
+        if not self.records:
+            return
+        origin = min(start for _, _, start, _, _ in self.records)
+        events = []
+        for name, page, start, duration, pid in self.records:
+            event = {
+                "name": name,
+                "cat": "build",
+                "ph": "X",
+                "ts": (start - origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": pid,
+            }
+            if page is not None:
+                event["args"] = {"page": page}
+            events.append(event)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class NullProfiler:
+    enabled = False
+    records = ()
+
+    def stage(self, name, page=None):
+        return null_stage
+
+    def add(self, records):
+        pass
+
+
+null_stage = nullcontext()
+null_profiler = NullProfiler()
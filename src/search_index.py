@@ -0,0 +1,162 @@
+import json
+import os
+import re
+from html import unescape
+from generate_content import page_title
+from htmlnode import LeafNode
+from markdown_blocks import markdown_to_blocks, block_to_html_node
+from manifest import file_hash
+from metadata import split_front_matter
+from pipeline import atomic_write
+
+search_index_version = 1
+prefix_length = 2
+term_pattern = re.compile(r"[^\W_]{2,}")
+title_weight = 10
+heading_weight = 5
+text_weight = 1
+heading_tags = ("h1", "h2", "h3", "h4", "h5", "h6")
+markup_pattern = re.compile(r"<[^>]*>")
+
+
+def new_search_state(basepath="/"):
+    return {"version": search_index_version, "basepath": basepath, "next_id": 0, "pages": {}, "postings": {}}
+
+def load_search_state(path, basepath="/"):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return new_search_state(basepath)
+    if state.get("version") != search_index_version or state.get("basepath") != basepath:
+        return new_search_state(basepath)
+    return state
+
+def save_search_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, json.dumps(state, separators=(",", ":")))
+
+def tokenize(text):
+    return term_pattern.findall(text.lower())
+
+def add_terms(terms, text, weight):
+    for term in tokenize(text):
+        terms[term] = terms.get(term, 0) + weight
+
+def page_terms(markdown):
+    metadata, markdown = split_front_matter(markdown)
+    title = page_title(metadata, markdown)
+    terms = {}
+    add_terms(terms, title, title_weight)
+    for block in markdown_to_blocks(markdown):
+        node = block_to_html_node(block)
+        weight = heading_weight if node.tag in heading_tags else text_weight
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, LeafNode):
+                value = node.value
+                if node.tag == "code" and "language-" in node.props.get("class", ""):
+                    # Highlighted code carries token markup.
+                    value = unescape(markup_pattern.sub("", value))
+                add_terms(terms, value, weight)
+                if node.props.get("alt"):
+                    add_terms(terms, node.props["alt"], weight)
+            elif node.children:
+                nodes.extend(node.children)
+    return title, terms
+
+def page_url(dest_path, dest_dir_path, basepath):
+    relative_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if relative_path == "index.html":
+        return basepath
+    if relative_path.endswith("/index.html"):
+        relative_path = relative_path[:-len("index.html")]
+    return basepath + relative_path
+
+def update_postings(state, page_id, old_terms, new_terms, touched):
+    for term in old_terms.keys() | new_terms.keys():
+        weight = new_terms.get(term)
+        if old_terms.get(term) == weight:
+            continue
+        prefix = term[:prefix_length]
+        shard = state["postings"].setdefault(prefix, {})
+        if weight is None:
+            postings = shard.get(term, {})
+            postings.pop(page_id, None)
+            if not postings:
+                shard.pop(term, None)
+        else:
+            shard.setdefault(term, {})[page_id] = weight
+        touched.add(prefix)
+
+def update_search_index(state, pages, dest_dir_path):
+    old_pages = state["pages"]
+    new_pages = {}
+    touched = set()
+    updated = 0
+    for source_path, dest_path in pages:
+        stat = os.stat(source_path)
+        entry = old_pages.get(source_path)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            new_pages[source_path] = entry
+            continue
+        content_hash = file_hash(source_path)
+        url = page_url(dest_path, dest_dir_path, state["basepath"])
+        if entry is not None and entry["hash"] == content_hash and entry["url"] == url:
+            new_pages[source_path] = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+            continue
+        with open(source_path) as markdown_file:
+            title, terms = page_terms(markdown_file.read())
+        if entry is None:
+            page_id = str(state["next_id"])
+            state["next_id"] += 1
+            old_terms = {}
+        else:
+            page_id = entry["id"]
+            old_terms = entry["terms"]
+        update_postings(state, page_id, old_terms, terms, touched)
+        new_pages[source_path] = {
+            "id": page_id,
+            "hash": content_hash,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "url": url,
+            "title": title,
+            "terms": terms,
+        }
+        updated += 1
+    removed = 0
+    for source_path, entry in old_pages.items():
+        if source_path not in new_pages:
+            update_postings(state, entry["id"], entry["terms"], {}, touched)
+            removed += 1
+    state["pages"] = new_pages
+    return touched, updated, removed
+
+def write_search_index(state, output_dir, touched):
+    os.makedirs(output_dir, exist_ok=True)
+    for prefix in touched:
+        shard = state["postings"].get(prefix)
+        shard_path = os.path.join(output_dir, f"{prefix}.json")
+        if not shard:
+            state["postings"].pop(prefix, None)
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+            continue
+        postings = {term: sorted(ids.items(), key=lambda item: -item[1]) for term, ids in sorted(shard.items())}
+        atomic_write(shard_path, json.dumps(postings, separators=(",", ":")))
+    index = {
+        "version": search_index_version,
+        "prefix_length": prefix_length,
+        "pages": {entry["id"]: [entry["url"], entry["title"]] for entry in state["pages"].values()},
+        "shards": sorted(state["postings"]),
+    }
+    atomic_write(os.path.join(output_dir, "index.json"), json.dumps(index, separators=(",", ":")))
+
+def build_search_index(state, pages, dest_dir_path, output_dir):
+    touched, updated, removed = update_search_index(state, pages, dest_dir_path)
+    if not os.path.exists(os.path.join(output_dir, "index.json")):
+        touched = set(state["postings"])
+    write_search_index(state, output_dir, touched)
+    print(f"Indexed {updated} of {len(state['pages'])} pages for search, removed {removed}, wrote {len(touched)} shards.")
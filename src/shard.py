@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from copy_static import sync_file
+from pipeline import atomic_write
+
+shard_manifest_version = 1
+# Fixed per-page cost so that many tiny pages still spread across shards.
+page_overhead = 4096
+
+
+def parse_shard(text):
+    shard, separator, shards = text.partition("/")
+    try:
+        shard, shards = int(shard), int(shards)
+    except ValueError:
+        shard = shards = 0
+    if not separator or shards < 1 or not 1 <= shard <= shards:
+        raise ValueError(f"Invalid shard {text!r}, expected K/N with 1 <= K <= N.")
+    return shard, shards
+
+def shard_name(shard, shards):
+    return f"{shard}-of-{shards}"
+
+def path_hash(relative_path):
+    return hashlib.sha256(relative_path.encode()).hexdigest()
+
+def partition_pages(pages, dir_path_content, shards):
+    # Pages are ordered by the hash of their content path and the order is cut into
+    # ranges of equal total size, so every machine computes the same partition.
+    weighted = []
+    for source_path, dest_path in pages:
+        relative_path = os.path.relpath(source_path, dir_path_content).replace(os.sep, "/")
+        weight = os.path.getsize(source_path) + page_overhead
+        weighted.append((path_hash(relative_path), relative_path, weight, source_path))
+    weighted.sort()
+    total = sum(weight for _, _, weight, _ in weighted)
+    digest = hashlib.sha256()
+    assignment = {}
+    position = 0
+    for key, relative_path, weight, source_path in weighted:
+        assignment[source_path] = min(shards, int((position + weight / 2) * shards / total) + 1)
+        position += weight
+        digest.update(f"{relative_path}\0{weight}\0".encode())
+    return assignment, digest.hexdigest()
+
+def shard_pages(pages, dir_path_content, shard, shards):
+    assignment, partition = partition_pages(pages, dir_path_content, shards)
+    selected = [(source_path, dest_path) for source_path, dest_path in pages if assignment[source_path] == shard]
+    return selected, partition
+
+def write_shard_manifest(path, shard, shards, partition, basepath, template_hash, assets, pages, shard_dir, link_graph):
+    outputs = []
+    for source_path, dest_path in pages:
+        relative_path = os.path.relpath(dest_path, shard_dir).replace(os.sep, "/")
+        outputs.append({"output": relative_path, "source": source_path, "links": link_graph.get(dest_path)})
+    manifest = {
+        "version": shard_manifest_version,
+        "shard": shard,
+        "shards": shards,
+        "partition": partition,
+        "basepath": basepath,
+        "template_hash": template_hash,
+        "assets": assets or {},
+        "pages": outputs,
+    }
+    atomic_write(path, json.dumps(manifest))
+
+def load_shard_manifests(shard_dir):
+    manifests = []
+    for name in sorted(os.listdir(shard_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(shard_dir, name)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != shard_manifest_version:
+            raise ValueError(f"Unsupported shard manifest {name}, rebuild the shard.")
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError(f"No shard manifests found in {shard_dir}.")
+    first = manifests[0]
+    for manifest in manifests[1:]:
+        for key in ("shards", "partition", "basepath", "template_hash", "assets"):
+            if manifest[key] != first[key]:
+                raise ValueError(
+                    f"Shards {shard_name(first['shard'], first['shards'])} and "
+                    f"{shard_name(manifest['shard'], manifest['shards'])} were built with different {key}."
+                )
+    found = sorted(manifest["shard"] for manifest in manifests)
+    missing = sorted(set(range(1, first["shards"] + 1)) - set(found))
+    if missing or len(found) != first["shards"]:
+        raise ValueError(
+            f"Expected shards 1..{first['shards']} once each, found {found}"
+            + (f" (missing {', '.join(map(str, missing))})." if missing else ".")
+        )
+    return sorted(manifests, key=lambda manifest: manifest["shard"])
+
+def find_conflicts(manifests, static_paths):
+    owners = {path.replace(os.sep, "/"): "static" for path in static_paths}
+    conflicts = []
+    for manifest in manifests:
+        name = shard_name(manifest["shard"], manifest["shards"])
+        for page in manifest["pages"]:
+            owner = owners.get(page["output"])
+            if owner is not None:
+                conflicts.append(f"{page['output']} ({page['source']} in shard {name} and {owner})")
+                continue
+            owners[page["output"]] = f"{page['source']} in shard {name}"
+    return conflicts
+
+def check_conflicts(manifests, static_paths):
+    conflicts = find_conflicts(manifests, static_paths)
+    if conflicts:
+        raise ValueError(f"Found {len(conflicts)} conflicting output(s): {'; '.join(conflicts)}")
+
+def merge_shards(manifests, shard_dir, dest_dir_path, static_paths, link_mode="copy"):
+    check_conflicts(manifests, static_paths)
+    link_graph = {}
+    for manifest in manifests:
+        source_dir = os.path.join(shard_dir, shard_name(manifest["shard"], manifest["shards"]))
+        for page in manifest["pages"]:
+            source_path = os.path.join(source_dir, page["output"])
+            dest_path = os.path.join(dest_dir_path, page["output"])
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            sync_file(source_path, dest_path, link_mode)
+            link_graph[dest_path] = page["links"]
+        print(f"Merged {len(manifest['pages'])} pages from shard {shard_name(manifest['shard'], manifest['shards'])}")
+    return link_graph
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import re
+
+slot_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+url_attribute_pattern = re.compile(r'\b(href|src)="([^"]*)"')
+url_attributes = ("href", "src")
+max_loaded_templates = 8
+loaded_templates = {}
+# Only links and ids inside the layout's tags count, not text that merely looks like one.
+tag_url_pattern = re.compile(r'<\w+\s[^>]*?\b(?:href|src)="([^"]*)"')
+tag_id_pattern = re.compile(r'<\w+\s[^>]*?\bid="([^"]*)"')
+
+
+class Template:
+    def __init__(self, text, basepath="/", assets=None, images=None):
+        self.basepath = basepath
+        self.assets = assets or {}
+        self.images = images
+        self.cache_key = basepath
+        if self.assets or self.images is not None:
+            options = json.dumps([self.assets, self.images], sort_keys=True).encode()
+            self.cache_key = f"{basepath}:{hashlib.sha256(options).hexdigest()}"
+        self.parts = []
+        self.slots = {}
+        position = 0
+        for match in slot_pattern.finditer(text):
+            self.parts.append(self.rewrite_attributes(text[position:match.start()]))
+            self.slots.setdefault(match.group(1), []).append(len(self.parts))
+            self.parts.append(match.group(0))
+            position = match.end()
+        self.parts.append(self.rewrite_attributes(text[position:]))
+        layout = "".join(part for part in self.parts if not slot_pattern.fullmatch(part))
+        self.links = tag_url_pattern.findall(layout)
+        self.ids = tag_id_pattern.findall(layout)
+
+    def site_path(self, url):
+        if not url.startswith("/") or url.startswith("//"):
+            return None
+        return url[1:].split("?", 1)[0].split("#", 1)[0]
+
+    def rewrite_url(self, url):
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        path = url[1:]
+        if self.assets:
+            end = len(path.split("?", 1)[0].split("#", 1)[0])
+            path = self.assets.get(path[:end], path[:end]) + path[end:]
+        return self.basepath + path
+
+    def rewrite_attributes(self, text):
+        return url_attribute_pattern.sub(
+            lambda match: f'{match.group(1)}="{self.rewrite_url(match.group(2))}"',
+            text,
+        )
+
+    def add_image_hints(self, node, position):
+        size = self.images["sizes"].get(self.site_path(node.props.get("src", "")))
+        if size is not None:
+            node.props.setdefault("width", str(size[0]))
+            node.props.setdefault("height", str(size[1]))
+        if position >= self.images["eager"]:
+            node.props.setdefault("loading", "lazy")
+            node.props.setdefault("decoding", "async")
+
+    def rewrite_node_urls(self, node, images_seen=None, links=None, ids=None):
+        # Without a page position every image counts as below the fold.
+        if images_seen is None and self.images is not None:
+            images_seen = self.images["eager"]
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if node.tag == "img" and self.images is not None:
+                self.add_image_hints(node, images_seen)
+                images_seen += 1
+            for attribute in url_attributes:
+                url = node.props.get(attribute)
+                if url is not None:
+                    url = node.props[attribute] = self.rewrite_url(url)
+                    if links is not None:
+                        links.append(url)
+            if ids is not None and "id" in node.props:
+                ids.append(node.props["id"])
+            if node.children:
+                nodes.extend(reversed(node.children))
+        return images_seen
+
+    def page_rewriter(self):
+        return PageRewriter(self)
+
+    def render(self, **values):
+        parts = self.parts.copy()
+        for name, value in values.items():
+            for index in self.slots.get(name, ()):
+                parts[index] = value
+        return "".join(parts)
+
+    def write(self, out, **values):
+        slot_values = {}
+        for name, value in values.items():
+            for index in self.slots.get(name, ()):
+                slot_values[index] = value
+        for index, part in enumerate(self.parts):
+            value = slot_values.get(index, part)
+            if isinstance(value, str):
+                out.write(value)
+            else:
+                value.write_html(out)
+
+
+class PageRewriter:
+    def __init__(self, template):
+        self.template = template
+        self.cache_key = template.cache_key
+        self.images_seen = 0
+        self.links = []
+        self.ids = []
+
+    def position_key(self, block):
+        images = self.template.images
+        if images is None or self.images_seen >= images["eager"] or "![" not in block:
+            return None
+        return f"eager{self.images_seen}"
+
+    def rewrite_node_urls(self, node):
+        if self.template.images is None:
+            self.template.rewrite_node_urls(node, None, self.links, self.ids)
+            return
+        self.images_seen = self.template.rewrite_node_urls(node, self.images_seen, self.links, self.ids)
+
+    def rewrite_block(self, node):
+        # What the block adds to the page, stored with its cached html and replayed on a hit.
+        links, ids, images_seen = len(self.links), len(self.ids), self.images_seen
+        self.rewrite_node_urls(node)
+        return {"links": self.links[links:], "ids": self.ids[ids:], "images": self.images_seen - images_seen}
+
+    def replay_block(self, record):
+        self.images_seen += record["images"]
+        self.links.extend(record["links"])
+        self.ids.extend(record["ids"])
+
+    def link_graph(self):
+        return {"links": sorted(set(self.links)), "ids": sorted(set(self.ids))}
+
+
+def load_template(template_path, basepath="/", assets=None, images=None):
+    # Templates are immutable once parsed, so one build (or a long-running daemon) can reuse them.
+    stat = os.stat(template_path)
+    options = json.dumps([assets, images], sort_keys=True)
+    key = (os.path.abspath(template_path), stat.st_mtime_ns, stat.st_size, basepath, options)
+    template = loaded_templates.get(key)
+    if template is None:
+        with open(template_path) as template_file:
+            template = Template(template_file.read(), basepath, assets, images)
+        if len(loaded_templates) >= max_loaded_templates:
+            loaded_templates.clear()
+        loaded_templates[key] = template
+    return template
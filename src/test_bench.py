@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+bench_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "run.py")
+
+
+class TestBench(unittest.TestCase):
+    def test_small_run_reports_every_stage(self):
+        with tempfile.TemporaryDirectory() as root:
+            output = os.path.join(root, "report.json")
+            result = subprocess.run(
+                [
+                    sys.executable, bench_path, "--pages", "5", "--blocks", "5", "--repeat", "1",
+                    "--baseline", os.path.join(root, "missing.json"), "--output", output,
+                ],
+                capture_output=True,
+                text=True,
+                timeout=120,
+            )
+            self.assertEqual(0, result.returncode, result.stderr)
+            for stage in ("markdown_to_blocks", "generate_page", "main"):
+                self.assertIn(stage, result.stdout)
+            self.assertTrue(os.path.exists(output))
+
+
+if __name__ == "__main__":
+    unittest.main()
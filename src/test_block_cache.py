@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache, MemoryBlockCache
+from markdown_blocks import blocks_to_html_node, markdown_to_blocks, markdown_to_html_node
+from template import Template
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "blocks.sqlite")
+        self.cache = BlockCache(self.path, version="test")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        key = self.cache.key("/", "paragraph", "hello")
+        self.assertEqual({}, self.cache.get_many([key]))
+        self.cache.put_many({key: "<p>hello</p>"})
+        self.assertEqual({key: "<p>hello</p>"}, self.cache.get_many([key]))
+
+    def test_key_depends_on_namespace_and_version(self):
+        key = self.cache.key("/", "paragraph", "hello")
+        self.assertNotEqual(key, self.cache.key("/blog/", "paragraph", "hello"))
+        other = BlockCache(self.path, version="other")
+        self.assertNotEqual(key, other.key("/", "paragraph", "hello"))
+
+    def test_prune_evicts_least_recently_used(self):
+        self.cache.max_bytes = 20
+        old = self.cache.key("", "paragraph", "old")
+        new = self.cache.key("", "paragraph", "new")
+        self.cache.put_many({old: "x" * 15})
+        self.cache.put_many({new: "y" * 15})
+        self.assertEqual(1, self.cache.prune())
+        self.assertEqual({new: "y" * 15}, self.cache.get_many([old, new]))
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = MemoryBlockCache(30, version="test")
+        first, second, third = (cache.key("", "paragraph", text) for text in ("a", "b", "c"))
+        cache.put_many({first: "x" * 10, second: "y" * 10})
+        cache.get_many([first])
+        cache.put_many({third: "z" * 15})
+        self.assertEqual({first: "x" * 10, third: "z" * 15}, cache.get_many([first, second, third]))
+        self.assertEqual(25, cache.size)
+
+    def test_markdown_to_html_node_with_cache(self):
+        markdown = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(expected, markdown_to_html_node(markdown, self.cache).to_html())
+        self.assertEqual(expected, markdown_to_html_node(markdown, self.cache).to_html())
+
+    def test_image_positions_with_cache(self):
+        template = Template("{{ Content }}", images={"eager": 1, "sizes": {}})
+        first = markdown_to_blocks("![a](/a.png)\n\n![b](/b.png)")
+        second = markdown_to_blocks("![b](/b.png)\n\n![a](/a.png)")
+        for blocks in (first, second, first, second):
+            expected = blocks_to_html_node(blocks, None, template.page_rewriter()).to_html()
+            actual = blocks_to_html_node(blocks, self.cache, template.page_rewriter()).to_html()
+            self.assertEqual(expected, actual)
+            self.assertEqual(1, actual.count("lazy"))
+
+    def test_cached_blocks_report_the_same_links(self):
+        template = Template("{{ Content }}", "/site/")
+        blocks = markdown_to_blocks('[here](#here) and `<a href="/nowhere">`\n\n```\n<a id="fake" href="/raw">\n```')
+        graphs = []
+        for cache in (None, self.cache, self.cache, MemoryBlockCache(version="test")):
+            rewriter = template.page_rewriter()
+            blocks_to_html_node(blocks, cache, rewriter).to_html()
+            graphs.append(rewriter.link_graph())
+        self.assertEqual([{"links": ["#here"], "ids": []}] * 4, graphs)
+
+
+if __name__ == "__main__":
+    unittest.main()
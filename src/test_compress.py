@@ -0,0 +1,55 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_dir
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, "index.html")
+        self.write(self.page, "<p>hello</p>" * 200)
+        self.write(os.path.join(self.root, "small.css"), "p {}")
+        self.write(os.path.join(self.root, "image.png"), "x" * 5000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_compress_dir(self):
+        hashes = compress_dir(self.root, threshold=1024)
+        self.assertEqual(["index.html"], list(hashes))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual("<p>hello</p>" * 200, f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "image.png.gz")))
+
+    def test_compress_dir_skips_unchanged(self):
+        hashes = compress_dir(self.root, threshold=1024)
+        mtime = os.stat(self.page + ".gz").st_mtime_ns
+        compress_dir(self.root, hashes, threshold=1024)
+        self.assertEqual(mtime, os.stat(self.page + ".gz").st_mtime_ns)
+
+    def test_compress_dir_keeps_variants_fresh(self):
+        hashes = compress_dir(self.root, threshold=1024)
+        stat = os.stat(self.page)
+        self.write(self.page, "<p>hello</p>" * 200)
+        os.utime(self.page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        compress_dir(self.root, hashes, threshold=1024)
+        self.assertGreaterEqual(os.stat(self.page + ".gz").st_mtime_ns, os.stat(self.page).st_mtime_ns)
+
+    def test_compress_dir_removes_stale(self):
+        hashes = compress_dir(self.root, threshold=1024)
+        os.remove(self.page)
+        self.assertEqual({}, compress_dir(self.root, hashes, threshold=1024))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
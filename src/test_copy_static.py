@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+
+from copy_static import FileHashCache, asset_names, rewrite_css_urls, static_outputs, sync_dir
+
+
+class TestCopyStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.target = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_sync_copies_everything(self):
+        synced = sync_dir(self.source, self.target)
+        self.assertEqual([os.path.join("images", "a.png"), "index.css"], sorted(synced))
+        with open(os.path.join(self.target, "images", "a.png")) as f:
+            self.assertEqual("png", f.read())
+
+    def test_sync_skips_unchanged(self):
+        sync_dir(self.source, self.target)
+        target_css = os.path.join(self.target, "index.css")
+        inode = os.stat(target_css).st_ino
+        sync_dir(self.source, self.target)
+        self.assertEqual(inode, os.stat(target_css).st_ino)
+
+    def test_sync_removes_stale(self):
+        previous = sync_dir(self.source, self.target)
+        self.write(os.path.join(self.target, "page.html"), "generated")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        sync_dir(self.source, self.target, previous)
+        self.assertFalse(os.path.exists(os.path.join(self.target, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.target, "page.html")))
+
+    def test_asset_names(self):
+        self.write(os.path.join(self.source, "CNAME"), "example.com")
+        names = asset_names(self.source)
+        self.assertEqual(["images/a.png", "index.css"], sorted(names))
+        self.assertRegex(names["index.css"], r"^index\.[0-9a-f]{10}\.css$")
+        self.assertEqual(names, asset_names(self.source))
+        self.write(os.path.join(self.source, "index.css"), "body { margin: 0 }")
+        changed = asset_names(self.source)
+        self.assertNotEqual(names["index.css"], changed["index.css"])
+        self.assertEqual(names["images/a.png"], changed["images/a.png"])
+
+    def test_sync_fingerprinted(self):
+        names = asset_names(self.source)
+        previous = sync_dir(self.source, self.target, names=names)
+        self.assertTrue(os.path.exists(os.path.join(self.target, names["images/a.png"])))
+        self.assertFalse(os.path.exists(os.path.join(self.target, "index.css")))
+        self.write(os.path.join(self.source, "index.css"), "body { margin: 0 }")
+        new_names = asset_names(self.source)
+        sync_dir(self.source, self.target, previous, names=new_names)
+        self.assertFalse(os.path.exists(os.path.join(self.target, names["index.css"])))
+        self.assertTrue(os.path.exists(os.path.join(self.target, new_names["index.css"])))
+
+    def test_rewrite_css_urls(self):
+        names = {"images/a.png": "images/a.1234567890.png", "fonts/b.woff2": "fonts/b.abcdefabcd.woff2"}
+        text = (
+            'a { background: url(../images/a.png?v=1) } b { src: url("../fonts/b.woff2#x") } '
+            "c { background: url('/images/a.png') } d { background: url(data:image/png;base64,AA) }"
+        )
+        expected = (
+            'a { background: url(../images/a.1234567890.png?v=1) } b { src: url("../fonts/b.abcdefabcd.woff2#x") } '
+            "c { background: url('/images/a.1234567890.png') } d { background: url(data:image/png;base64,AA) }"
+        )
+        self.assertEqual(expected, rewrite_css_urls(text, "css/site.css", names))
+
+    def test_fingerprinted_stylesheet_references(self):
+        self.write(os.path.join(self.source, "index.css"), 'body { background: url("images/a.png") }')
+        names = asset_names(self.source)
+        sync_dir(self.source, self.target, names=names)
+        with open(os.path.join(self.target, names["index.css"])) as f:
+            self.assertEqual(f'body {{ background: url("{names["images/a.png"]}") }}', f.read())
+        self.write(os.path.join(self.source, "images", "a.png"), "new png")
+        changed = asset_names(self.source)
+        self.assertNotEqual(names["index.css"], changed["index.css"])
+
+    def test_hash_cache_skips_unchanged_files(self):
+        path = os.path.join(self.tmp.name, "hashes.json")
+        hash_cache = FileHashCache(path)
+        names = asset_names(self.source, hash_cache)
+        hash_cache.save()
+        png = os.path.join(self.source, "images", "a.png")
+        stat = os.stat(png)
+        self.write(png, "PNG")
+        os.utime(png, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(names, asset_names(self.source, FileHashCache(path)))
+        os.utime(png, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertNotEqual(names["images/a.png"], asset_names(self.source, FileHashCache(path))["images/a.png"])
+
+    def test_static_outputs_match_sync(self):
+        names = asset_names(self.source)
+        self.assertEqual(sync_dir(self.source, self.target), static_outputs(self.source))
+        self.assertEqual(sync_dir(self.source, self.target, names=names), static_outputs(self.source, names))
+
+    def test_sync_hardlink(self):
+        sync_dir(self.source, self.target, link_mode="hardlink")
+        source_stat = os.stat(os.path.join(self.source, "index.css"))
+        target_stat = os.stat(os.path.join(self.target, "index.css"))
+        self.assertTrue(os.path.samestat(source_stat, target_stat))
+
+    def test_sync_reflink_falls_back(self):
+        sync_dir(self.source, self.target, link_mode="reflink")
+        with open(os.path.join(self.target, "index.css")) as f:
+            self.assertEqual("body {}", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
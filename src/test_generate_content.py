@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+
+from generate_content import (
+    extract_title,
+    collect_pages,
+    generate_site,
+    generate_pages_incremental,
+)
+from manifest import new_manifest
+
+
+class TestGenerateContent(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.docs)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nText")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def build(self, manifest, basepath="/", link_graph=None):
+        generate_pages_incremental(self.content, self.template, self.docs, basepath, manifest, link_graph=link_graph)
+        return {entry["dest"]: entry for entry in manifest["pages"].values()}
+
+    def test_extract_title(self):
+        self.assertEqual("Hello", extract_title("intro\n# Hello\n## Sub"))
+        self.assertRaises(ValueError, extract_title, "## No title")
+
+    def test_collect_pages(self):
+        expected = [
+            (os.path.join(self.content, "index.md"), os.path.join(self.docs, "index.html")),
+            (os.path.join(self.content, "blog", "post.md"), os.path.join(self.docs, "blog", "post.html")),
+        ]
+        self.assertEqual(expected, collect_pages(self.content, self.docs))
+
+    def test_collect_pages_reuses_listing_until_a_directory_changes(self):
+        old = 10**9
+        for path in (self.content, os.path.join(self.content, "blog")):
+            os.utime(path, ns=(old, old))
+        pages = collect_pages(self.content, self.docs)
+        os.remove(os.path.join(self.content, "index.md"))
+        os.utime(self.content, ns=(old, old))
+        self.assertEqual(pages, collect_pages(self.content, self.docs))
+        os.utime(self.content, ns=(old + 1, old + 1))
+        self.assertEqual(pages[1:], collect_pages(self.content, self.docs))
+
+    def test_incremental_skips_unchanged(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        self.assertEqual("<title>Post</title><div><h1>Post</h1><p>Text</p></div>", self.read("blog", "post.html"))
+        self.write(os.path.join(self.docs, "index.html"), "untouched")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nChanged")
+        self.build(manifest)
+        self.assertEqual("untouched", self.read("index.html"))
+        self.assertIn("Changed", self.read("blog", "post.html"))
+
+    def test_incremental_template_change(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        self.build(manifest)
+        self.assertEqual("<h1>Home</h1>", self.read("index.html"))
+        self.assertEqual("<h1>Post</h1>", self.read("blog", "post.html"))
+
+    def test_incremental_minify_change(self):
+        self.write(self.template, "<title>{{ Title }}</title>\n\n    <main>{{ Content }}</main>\n")
+        manifest = new_manifest()
+        self.build(manifest)
+        plain = self.read("index.html")
+        generate_pages_incremental(self.content, self.template, self.docs, "/", manifest, minify=True)
+        minified = self.read("index.html")
+        self.assertLess(len(minified), len(plain))
+        self.build(manifest)
+        self.assertEqual(plain, self.read("index.html"))
+
+    def test_incremental_removes_stale(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        pages = self.build(manifest)
+        self.assertEqual([os.path.join(self.docs, "index.html")], list(pages))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_incremental_keeps_link_graph(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)")
+        manifest = new_manifest()
+        self.build(manifest)
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n[Home](/)")
+        link_graph = {}
+        self.build(manifest, link_graph=link_graph)
+        self.assertEqual(
+            {
+                os.path.join(self.docs, "index.html"): {"links": ["/blog/post"], "ids": []},
+                os.path.join(self.docs, "blog", "post.html"): {"links": ["/"], "ids": []},
+            },
+            link_graph,
+        )
+
+    def test_parallel_matches_sequential(self):
+        generate_site(self.content, self.template, self.docs, "/", jobs=1)
+        sequential = [self.read("index.html"), self.read("blog", "post.html")]
+        generate_site(self.content, self.template, self.docs, "/", jobs=2)
+        self.assertEqual(sequential, [self.read("index.html"), self.read("blog", "post.html")])
+
+    def test_streaming_matches_default(self):
+        self.write(os.path.join(self.content, "index.md"), "Intro [link](/blog)\n\n# Home\n\n- a\n- b\n")
+        generate_site(self.content, self.template, self.docs, "/site/")
+        expected = self.read("index.html")
+        generate_site(self.content, self.template, self.docs, "/site/", stream=True)
+        self.assertEqual(expected, self.read("index.html"))
+        self.assertIn('href="/site/blog"', expected)
+
+    def test_front_matter(self):
+        self.write(os.path.join(self.content, "index.md"), "---\ntitle: Front\n---\n# Home\n\nText")
+        generate_site(self.content, self.template, self.docs, "/")
+        expected = self.read("index.html")
+        self.assertTrue(expected.startswith("<title>Front</title><div><h1>Home</h1>"))
+        generate_site(self.content, self.template, self.docs, "/", stream=True)
+        self.assertEqual(expected, self.read("index.html"))
+
+    def test_pipelined_matches_default(self):
+        self.write(os.path.join(self.content, "index.md"), "Intro [link](/blog)\n\n# Home\n\n- a\n- b\n")
+        generate_site(self.content, self.template, self.docs, "/site/")
+        expected = [self.read("index.html"), self.read("blog", "post.html")]
+        generate_site(self.content, self.template, self.docs, "/site/", read_ahead=1)
+        self.assertEqual(expected, [self.read("index.html"), self.read("blog", "post.html")])
+
+    def test_pipelined_reports_failures(self):
+        bad_page = os.path.join(self.content, "blog", "bad.md")
+        self.write(bad_page, "no title here")
+        with self.assertRaises(ValueError) as cm:
+            generate_site(self.content, self.template, self.docs, "/", read_ahead=2)
+        self.assertIn(bad_page, str(cm.exception))
+        self.assertIn("Post", self.read("blog", "post.html"))
+
+    def test_parallel_reports_failures(self):
+        bad_page = os.path.join(self.content, "blog", "bad.md")
+        self.write(bad_page, "no title here")
+        with self.assertRaises(ValueError) as cm:
+            generate_site(self.content, self.template, self.docs, "/", jobs=2)
+        self.assertIn(bad_page, str(cm.exception))
+        self.assertIn("Home", self.read("index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
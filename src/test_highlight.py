@@ -0,0 +1,50 @@
+import unittest
+
+from highlight import highlight, highlight_language, tokenize
+
+
+class TestHighlight(unittest.TestCase):
+    def test_language_aliases(self):
+        self.assertEqual(highlight_language("py"), "python")
+        self.assertEqual(highlight_language(" JS {.numberLines}"), "javascript")
+        self.assertEqual(highlight_language(""), "")
+        self.assertEqual(highlight_language("c++"), "c++")
+        self.assertEqual(highlight_language("x = 1"), "")
+
+    def test_tokenize_keeps_all_text(self):
+        code = 'func main() {\n\tfmt.Println("hi") // greet\n\treturn 42\n}'
+        tokens = list(tokenize("go", code))
+        self.assertEqual("".join(text for _, text in tokens), code)
+        self.assertIn(("k", "func"), tokens)
+        self.assertIn(("s", '"hi"'), tokens)
+        self.assertIn(("c", "// greet"), tokens)
+        self.assertIn(("m", "42"), tokens)
+
+    def test_strings_hide_comments(self):
+        self.assertEqual(
+            highlight("python", 's = "# not a comment"'),
+            's = <span class="s">"# not a comment"</span>',
+        )
+
+    def test_json_keys(self):
+        self.assertEqual(
+            highlight("json", '{"a": true}'),
+            '{<span class="na">"a"</span>: <span class="k">true</span>}',
+        )
+
+    def test_html_is_escaped(self):
+        self.assertEqual(
+            highlight("html", '<a href="/">x</a>'),
+            '<span class="nt">&lt;a</span> <span class="na">href</span>=<span class="s">"/"</span>'
+            '<span class="nt">&gt;</span>x<span class="nt">&lt;/a</span><span class="nt">&gt;</span>',
+        )
+
+    def test_memoized(self):
+        highlight.cache_clear()
+        highlight("bash", "echo $HOME")
+        highlight("bash", "echo $HOME")
+        self.assertEqual(highlight.cache_info().hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
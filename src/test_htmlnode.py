@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -12,6 +13,13 @@ class TestHTMLNode(unittest.TestCase):
                         not node.props)
         self.assertEqual(node.props_to_html(), "")
     
+    def test_default_props_not_shared(self):
+        node = LeafNode("p", "text")
+        with self.assertRaises(TypeError):
+            node.props["class"] = "x"
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(0, len(LeafNode("b", "other").props))
+
     def test_repr(self):
         node = HTMLNode("a", "Link", [], {"href": "https://www.boot.dev"})
         expected = "tag: a\nvalue: Link\nchildren: []\nprops:  href=\"https://www.boot.dev\"\n"
@@ -92,6 +100,23 @@ class TestHTMLNode(unittest.TestCase):
         expected = "<body><h1>Header for this test</h1><p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p><p>Normal text2<i>italic text2</i><a href=\"https://www.google.com\">Click me!</a>Normal text2</p></body>"
         actual = parent.to_html()
         self.assertEqual(expected, actual)
+    def test_write_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/blog"}),
+            ],
+        )
+        out = StringIO()
+        node.write_html(out)
+        expected = "<div><p><b>Bold</b> text</p><a href=\"/blog\">link</a></div>"
+        self.assertEqual(expected, out.getvalue())
+        self.assertEqual(expected, node.to_html())
+
+    def test_write_html_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        self.assertRaises(ValueError, node.write_html, StringIO())
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from images import ImageSizeCache, image_size
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x06\0\0\0"
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\0" * 8
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\0" * 10
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+def webp(chunk, data):
+    body = b"WEBP" + chunk + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_png(self):
+        self.assertEqual((640, 480), image_size(self.write("a.png", png(640, 480))))
+
+    def test_gif(self):
+        self.assertEqual((16, 9), image_size(self.write("a.gif", gif(16, 9))))
+
+    def test_jpeg(self):
+        self.assertEqual((1920, 1080), image_size(self.write("a.jpg", jpeg(1920, 1080))))
+
+    def test_webp(self):
+        lossy = b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\0" * 4
+        self.assertEqual((300, 200), image_size(self.write("lossy.webp", webp(b"VP8 ", lossy))))
+        bits = (300 - 1) | ((200 - 1) << 14)
+        lossless = b"\x2f" + bits.to_bytes(4, "little") + b"\0" * 4
+        self.assertEqual((300, 200), image_size(self.write("lossless.webp", webp(b"VP8L", lossless))))
+        extended = b"\0" * 4 + (300 - 1).to_bytes(3, "little") + (200 - 1).to_bytes(3, "little")
+        self.assertEqual((300, 200), image_size(self.write("extended.webp", webp(b"VP8X", extended))))
+
+    def test_unknown(self):
+        self.assertIsNone(image_size(self.write("a.png", b"not an image")))
+
+    def test_cache(self):
+        static = os.path.join(self.root, "static")
+        self.write("static/images/a.png", png(2, 3))
+        self.write("static/images/b.png", png(2, 3))
+        self.write("static/index.css", b"body {}")
+        cache_path = os.path.join(self.root, "images.json")
+        cache = ImageSizeCache(cache_path)
+        self.assertEqual({"images/a.png": [2, 3], "images/b.png": [2, 3]}, cache.scan(static))
+        self.assertEqual(1, len(cache.sizes))
+        cache.save()
+        os.remove(os.path.join(static, "images", "b.png"))
+        cache = ImageSizeCache(cache_path)
+        self.assertEqual({"images/a.png": [2, 3]}, cache.scan(static))
+        self.assertEqual([os.path.join(static, "images", "a.png")], list(cache.files))
+
+
+if __name__ == "__main__":
+    unittest.main()
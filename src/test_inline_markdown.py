@@ -176,6 +176,36 @@ class TestInlineMarkdown(unittest.TestCase):
         actual = text_to_textnodes(text)
         self.assertEqual(expected, actual)
     
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[link {i}](https://example.com/{i}) and **bold {i}**" for i in range(3))
+        expected = []
+        for i in range(3):
+            if i:
+                expected.append(TextNode(" ", text_type_text))
+            expected.extend([
+                TextNode(f"link {i}", text_type_link, f"https://example.com/{i}"),
+                TextNode(" and ", text_type_text),
+                TextNode(f"bold {i}", text_type_bold),
+            ])
+        actual = text_to_textnodes(text)
+        self.assertEqual(expected, actual)
+
+    def test_text_to_textnodes_precedence(self):
+        text = "_italic **bold** italic_ and **bold `code` bold**"
+        self.assertRaises(SyntaxError, text_to_textnodes, text)
+        text = "**bold `code` bold** and _italic_"
+        expected = [
+            TextNode("bold `code` bold", text_type_bold),
+            TextNode(" and ", text_type_text),
+            TextNode("italic", text_type_italic),
+        ]
+        actual = text_to_textnodes(text)
+        self.assertEqual(expected, actual)
+
+    def test_text_to_textnodes_unclosed(self):
+        self.assertRaises(SyntaxError, text_to_textnodes, "This is **bold text")
+        self.assertRaises(SyntaxError, text_to_textnodes, "An _italic [link](https://boot.dev)_")
+
     def test_text_to_textnodes_no_text(self):
         text = ""
         expected = []
@@ -0,0 +1,51 @@
+import unittest
+
+from links import check_links, resolve_link
+
+
+class TestLinks(unittest.TestCase):
+    def test_resolve_link(self):
+        self.assertEqual(("blog/tom", ""), resolve_link("/site/blog/tom", "index.html", "/site/"))
+        self.assertEqual(("blog/index.html", "top"), resolve_link("/site/blog/#top", "index.html", "/site/"))
+        self.assertEqual(("index.html", ""), resolve_link("/site/", "blog/post.html", "/site/"))
+        self.assertEqual(("blog/other.html", ""), resolve_link("other.html", "blog/post.html", "/site/"))
+        self.assertEqual(("images/a%b.png", ""), resolve_link("../images/a%25b.png", "blog/post.html", "/"))
+        self.assertEqual(("blog/post.html", "intro"), resolve_link("#intro", "blog/post.html", "/"))
+        self.assertIsNone(resolve_link("https://www.boot.dev", "index.html", "/"))
+        self.assertIsNone(resolve_link("//cdn.example.com/x.js", "index.html", "/"))
+        self.assertIsNone(resolve_link("mailto:me@example.com", "index.html", "/"))
+        self.assertIsNone(resolve_link("/other/page", "index.html", "/site/"))
+
+    def test_check_links(self):
+        link_graph = {
+            "docs/index.html": {"links": ["/blog/post", "/blog/post#intro", "/images/tom.png", "#top"], "ids": []},
+            "docs/blog/post.html": {
+                "links": ["/", "/missing", "/#nowhere", "#intro", "other.html"],
+                "ids": ["intro"],
+            },
+        }
+        checked, broken = check_links(link_graph, "docs", ["images/tom.png", "index.css"], "/", ["/index.css"])
+        self.assertEqual(11, checked)
+        self.assertEqual(
+            [
+                ("blog/post.html", "/missing", "missing target"),
+                ("blog/post.html", "/#nowhere", "missing anchor"),
+                ("blog/post.html", "other.html", "missing target"),
+            ],
+            broken,
+        )
+
+    def test_template_ids_count_for_every_page(self):
+        link_graph = {"docs/index.html": {"links": ["/#main"], "ids": []}}
+        self.assertEqual((1, []), check_links(link_graph, "docs", [], "/", template_ids=["main"]))
+
+    def test_same_page_anchors_are_per_page(self):
+        link_graph = {
+            "docs/a.html": {"links": ["#x"], "ids": ["x"]},
+            "docs/b.html": {"links": ["#x"], "ids": []},
+        }
+        self.assertEqual([("b.html", "#x", "missing anchor")], check_links(link_graph, "docs", [], "/")[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import main
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content")
+        os.makedirs("static")
+        self.write("content/index.md", "# Home\n\n[Contact](/contact)")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, *argv):
+        with redirect_stdout(StringIO()):
+            self.assertEqual(0, main.run(list(argv)))
+        with open(os.path.join("docs", "index.html")) as f:
+            return f.read()
+
+    def test_incremental_after_full_build(self):
+        self.assertIn('href="/index.css"', self.build("--incremental"))
+        self.assertIn('href="/site/index.css"', self.build("/site/"))
+        page = self.build("--incremental")
+        self.assertIn('href="/index.css"', page)
+        self.assertIn('href="/contact"', page)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+
+from manifest import load_manifest, manifest_version, new_manifest, save_manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        manifest = new_manifest()
+        manifest["static"] = ["index.css"]
+        save_manifest(self.path, manifest)
+        self.assertEqual(manifest, load_manifest(self.path))
+
+    def test_old_version_starts_over(self):
+        with open(self.path, "w") as f:
+            json.dump({"version": 1, "template_hash": "x", "basepath": "/", "pages": {"a.md": {}}}, f)
+        self.assertEqual(new_manifest(), load_manifest(self.path))
+
+    def test_missing_keys_get_defaults(self):
+        with open(self.path, "w") as f:
+            json.dump({"version": manifest_version, "template_hash": "x", "basepath": "/", "pages": {}, "static": []}, f)
+        manifest = load_manifest(self.path)
+        self.assertEqual("x", manifest["template_hash"])
+        self.assertEqual({}, manifest["compressed"])
+        self.assertEqual({}, manifest["assets"])
+
+    def test_unreadable_manifest_starts_over(self):
+        with open(self.path, "w") as f:
+            f.write("{")
+        self.assertEqual(new_manifest(), load_manifest(self.path))
+        self.assertEqual(manifest_version, load_manifest(os.path.join(self.tmp.name, "missing.json"))["version"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
+from io import StringIO
 
 from markdown_blocks import (
     markdown_to_blocks,
+    iter_markdown_blocks,
     block_to_block_type,
     markdown_to_html_node,
     heading_block_to_html_node,
@@ -74,6 +76,25 @@ This is the same paragraph on a new line
         actual = markdown_to_blocks(markdown)
         self.assertListEqual(expected, actual)
     
+    def test_iter_markdown_blocks(self):
+        markdown = """
+This is **bolded** paragraph
+
+
+
+This is another paragraph
+on a new line
+
+
+* This is a list
+* with items
+
+"""
+        expected = markdown_to_blocks(markdown)
+        actual = list(iter_markdown_blocks(StringIO(markdown)))
+        self.assertListEqual(expected, actual)
+        self.assertListEqual(["a", ""], list(iter_markdown_blocks(StringIO("a\n\n\n"))))
+
     def test_heading_block_to_block_types(self):
         h_block_1 = "# This is a heading"
         h_block_2 = "## This is a heading"
@@ -227,6 +248,29 @@ Second line of code
 """
         self.assertRaises(ValueError, code_block_to_html_node, code)
     
+    def test_highlighted_code(self):
+        block = "```python\ndef add(a, b):\n    return a < b  # compare\n```"
+        self.assertEqual(
+            code_block_to_html_node(block).to_html(),
+            '<pre><code class="language-python"><span class="k">def</span> add(a, b):\n'
+            '    <span class="k">return</span> a &lt; b  <span class="c"># compare</span></code></pre>',
+        )
+
+    def test_code_without_language(self):
+        block = "```\nfunc main(){}\n```"
+        self.assertEqual(code_block_to_html_node(block).to_html(), "<pre>func main(){}</pre>")
+
+    def test_code_on_the_fence_line(self):
+        block = "```x = 1\ny = 2\n```"
+        self.assertEqual(code_block_to_html_node(block).to_html(), "<pre>x = 1\ny = 2</pre>")
+
+    def test_unknown_language_is_escaped(self):
+        block = "```brainfuck\n<>+\n```"
+        self.assertEqual(
+            code_block_to_html_node(block).to_html(),
+            '<pre><code class="language-brainfuck">&lt;&gt;+</code></pre>',
+        )
+
     def test_invalid_heading(self):
         heading1 = "####### this is an invalid heading"
         heading2 = "#"
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from metadata import MetadataIndex, read_front_matter, read_metadata, split_front_matter
+
+
+class TestMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.page = os.path.join(self.tmp.name, "page.md")
+        self.index_path = os.path.join(self.tmp.name, "metadata.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        with open(self.page, "w") as f:
+            f.write(text)
+
+    def test_split_front_matter(self):
+        markdown = '---\ntitle: "Hello: world"\nDate: 2024-01-01\nbroken line\n---\n# Heading\n\nText'
+        metadata, body = split_front_matter(markdown)
+        self.assertEqual({"title": "Hello: world", "date": "2024-01-01"}, metadata)
+        self.assertEqual("# Heading\n\nText", body)
+
+    def test_no_front_matter(self):
+        self.assertEqual(({}, "# Heading"), split_front_matter("# Heading"))
+        self.assertEqual(({}, "---\n# Heading"), split_front_matter("---\n# Heading"))
+
+    def test_read_front_matter_keeps_unconsumed_lines(self):
+        markdown_file = StringIO("# Heading\n\nText\n")
+        self.assertEqual(({}, ["# Heading\n"]), read_front_matter(markdown_file))
+        self.assertEqual("\nText\n", markdown_file.read())
+
+    def test_read_metadata(self):
+        self.write("---\nauthor: Tom\n---\nIntro\n\n# The Title\n\nText")
+        self.assertEqual({"author": "Tom", "title": "The Title"}, read_metadata(self.page))
+        self.write("---\ntitle: Front\n---\n# Heading")
+        self.assertEqual({"title": "Front"}, read_metadata(self.page))
+        self.write("No title")
+        self.assertEqual({}, read_metadata(self.page))
+
+    def test_index_reuses_unchanged_pages(self):
+        self.write("# First")
+        index = MetadataIndex(self.index_path)
+        self.assertEqual({self.page: {"title": "First"}}, index.update([self.page]))
+        index.save()
+        index = MetadataIndex(self.index_path)
+        self.assertEqual({"title": "First"}, index.get(self.page))
+        self.assertFalse(index.changed)
+        self.write("# Second title")
+        self.assertEqual({"title": "Second title"}, index.get(self.page))
+        self.assertEqual({}, index.update([]))
+        self.assertEqual({}, index.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
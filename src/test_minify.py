@@ -0,0 +1,45 @@
+import unittest
+from io import StringIO
+
+import minify
+from minify import MinifyingWriter
+
+
+def minified(*chunks):
+    out = StringIO()
+    writer = MinifyingWriter(out)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    return out.getvalue(), writer.saved
+
+
+class TestMinify(unittest.TestCase):
+    def test_collapses_whitespace(self):
+        html, saved = minified("<div>\n  <p>Some   <b>bold</b>\n text</p>\n</div>\n")
+        self.assertEqual("<div><p>Some <b>bold</b> text</p></div>", html)
+        self.assertEqual(len("<div>\n  <p>Some   <b>bold</b>\n text</p>\n</div>\n") - len(html), saved)
+
+    def test_drops_comments_and_quotes(self):
+        html, _ = minified('<!-- note --><a href="/x" class="a b">x</a><img src="a.png"/>')
+        self.assertEqual('<a href=/x class="a b">x</a><img src="a.png"/>', html)
+
+    def test_keeps_pre_and_code(self):
+        source = "<pre><code>  keep\n\n   this  <!-- too --></code></pre>\n<p>inline <code>a  b</code></p>"
+        html, _ = minified(source)
+        self.assertEqual("<pre><code>  keep\n\n   this  <!-- too --></code></pre><p>inline <code>a  b</code></p>", html)
+
+    def test_streaming_matches_whole(self):
+        source = '<!doctype html>\n<html>\n<head><title> Hi </title></head>\n<body><pre>  x </pre> <p>a  &lt; <i>b</i> <!-- c -->d</p></body>\n</html>'
+        expected, _ = minified(source)
+        chunk_size = minify.chunk_size
+        minify.chunk_size = 1
+        try:
+            self.assertEqual(expected, minified(*source)[0])
+            self.assertEqual(expected, minified(source[:17], source[17:40], source[40:])[0])
+        finally:
+            minify.chunk_size = chunk_size
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager
+
+from pipeline import BackgroundWriter, atomic_write, pipelined
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_atomic_write(self):
+        path = os.path.join(self.root, "page.html")
+        atomic_write(path, "one")
+        atomic_write(path, "two")
+        self.assertEqual("two", self.read(path))
+        self.assertEqual(["page.html"], os.listdir(self.root))
+
+    def test_pipelined_in_order(self):
+        pages = []
+        for i in range(10):
+            pages.append((self.write(f"{i}.md", str(i)), os.path.join(self.root, f"{i}.html")))
+        results = list(pipelined(pages, lambda source, text: text * 2, read_ahead=3))
+        self.assertEqual([(source, None) for source, _ in pages], results)
+        for i, (_, dest) in enumerate(pages):
+            self.assertEqual(str(i) * 2, self.read(dest))
+
+    def test_pipelined_reports_errors(self):
+        good = self.write("good.md", "good")
+        bad = self.write("bad.md", "bad")
+        missing_dir = os.path.join(self.root, "missing", "out.html")
+
+        def render(source, text):
+            if text == "bad":
+                raise ValueError("broken")
+            return text
+
+        pages = [(bad, os.path.join(self.root, "bad.html")), (good, missing_dir)]
+        results = list(pipelined(pages, render, read_ahead=2))
+        self.assertEqual(2, len(results))
+        self.assertEqual((bad, "ValueError: broken"), results[0])
+        self.assertEqual(good, results[1][0])
+        self.assertIn("FileNotFoundError", results[1][1])
+
+    def test_pipelined_reports_pages_after_writing(self):
+        pages = []
+        for i in range(5):
+            pages.append((self.write(f"{i}.md", str(i)), os.path.join(self.root, f"{i}.html")))
+        for source, error in pipelined(pages, lambda source, text: text, read_ahead=2):
+            self.assertIsNone(error)
+            self.assertEqual(self.read(source), self.read(source[:-3] + ".html"))
+
+    def test_writer_bounds_pending_pages(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        class BlockingProfiler:
+            @contextmanager
+            def stage(self, name, page=None):
+                started.set()
+                release.wait()
+                yield
+
+        writer = BackgroundWriter(max_pending=2, profiler=BlockingProfiler())
+        paths = [os.path.join(self.root, f"{i}.html") for i in range(3)]
+        writer.put("0.md", paths[0], "0")
+        started.wait()
+        writer.put("1.md", paths[1], "1")
+        writer.put("2.md", paths[2], "2")
+        self.assertTrue(writer.pending.full())
+        release.set()
+        self.assertEqual([], writer.close())
+        self.assertEqual(["0", "1", "2"], [self.read(path) for path in paths])
+
+
+if __name__ == "__main__":
+    unittest.main()
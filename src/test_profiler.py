@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiler import Profiler, null_profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_totals(self):
+        profiler = Profiler()
+        for page in ("a.md", "b.md"):
+            with profiler.stage("read", page):
+                pass
+        with profiler.stage("walk"):
+            pass
+        totals = profiler.stage_totals()
+        self.assertEqual(2, totals["read"][0])
+        self.assertEqual(1, totals["walk"][0])
+        self.assertEqual(["a.md", "b.md"], sorted(profiler.page_totals()))
+
+    def test_stage_records_on_error(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage("render", "a.md"):
+                raise ValueError("bad page")
+        self.assertEqual(1, len(profiler.records))
+
+    def test_null_profiler(self):
+        with null_profiler.stage("read", "a.md"):
+            pass
+        self.assertFalse(null_profiler.enabled)
+        self.assertEqual((), null_profiler.records)
+
+    def test_write_trace(self):
+        profiler = Profiler()
+        with profiler.stage("read", "a.md"):
+            pass
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "trace.json")
+            profiler.write_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual("read", events[0]["name"])
+        self.assertEqual("X", events[0]["ph"])
+        self.assertEqual({"page": "a.md"}, events[0]["args"])
+
+
+if __name__ == "__main__":
+    unittest.main()
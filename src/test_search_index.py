@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+from search_index import build_search_index, new_search_state, page_terms, page_url
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.search = os.path.join(self.docs, "search")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.home = self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the shire")
+        self.post = self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n## Rivendell\n\nElves")
+        self.pages = [
+            (self.home, os.path.join(self.docs, "index.html")),
+            (self.post, os.path.join(self.docs, "blog", "post.html")),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read_json(self, name):
+        with open(os.path.join(self.search, name)) as f:
+            return json.load(f)
+
+    def test_page_terms(self):
+        title, terms = page_terms("# The Shire\n\n## Hobbits\n\nHobbits like **food** ![a hobbit hole](/x.png)")
+        self.assertEqual("The Shire", title)
+        self.assertEqual(15, terms["shire"])
+        self.assertEqual(6, terms["hobbits"])
+        self.assertEqual(1, terms["food"])
+        self.assertEqual(1, terms["hole"])
+        self.assertNotIn("a", terms)
+
+    def test_page_url(self):
+        self.assertEqual("/site/", page_url("docs/index.html", "docs", "/site/"))
+        self.assertEqual("/site/blog/tom/", page_url("docs/blog/tom/index.html", "docs", "/site/"))
+        self.assertEqual("/site/about.html", page_url("docs/about.html", "docs", "/site/"))
+
+    def test_build_index(self):
+        state = new_search_state("/")
+        build_search_index(state, self.pages, self.docs, self.search)
+        index = self.read_json("index.json")
+        self.assertEqual({"0": ["/", "Home"], "1": ["/blog/post.html", "Post"]}, index["pages"])
+        self.assertIn("ri", index["shards"])
+        self.assertEqual({"rivendell": [["1", 5]]}, self.read_json("ri.json"))
+
+    def test_incremental_update_touches_changed_shards(self):
+        state = new_search_state("/")
+        build_search_index(state, self.pages, self.docs, self.search)
+        shire_mtime = os.stat(os.path.join(self.search, "sh.json")).st_mtime_ns
+        self.write(self.post, "# Post\n\nDwarves")
+        build_search_index(state, self.pages, self.docs, self.search)
+        self.assertEqual(shire_mtime, os.stat(os.path.join(self.search, "sh.json")).st_mtime_ns)
+        self.assertFalse(os.path.exists(os.path.join(self.search, "ri.json")))
+        self.assertEqual({"dwarves": [["1", 1]]}, self.read_json("dw.json"))
+
+    def test_removed_page(self):
+        state = new_search_state("/")
+        build_search_index(state, self.pages, self.docs, self.search)
+        build_search_index(state, self.pages[:1], self.docs, self.search)
+        index = self.read_json("index.json")
+        self.assertEqual(["0"], list(index["pages"]))
+        self.assertNotIn("el", index["shards"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server import (
+    AsyncServer,
+    FileCache,
+    accepted_encodings,
+    etag_matches,
+    file_response,
+    negotiate_encoding,
+    parse_range,
+    percentile,
+)
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines)
+    body = await reader.readexactly(int(headers.get("Content-Length", 0)))
+    return int(status_line.split()[1]), headers, body
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_hits_and_misses(self):
+        cache = FileCache()
+        path = self.write("a.html", b"hello")
+        body, etag = cache.get(path, os.stat(path))
+        self.assertEqual(b"hello", body)
+        self.assertEqual((body, etag), cache.get(path, os.stat(path)))
+        self.assertEqual({"hits": 1, "misses": 1, "entries": 1, "bytes": 5}, {
+            key: value for key, value in cache.stats().items() if key != "max_bytes"
+        })
+
+    def test_invalidated_when_mtime_changes(self):
+        cache = FileCache()
+        path = self.write("a.html", b"hello")
+        _, etag = cache.get(path, os.stat(path))
+        self.write("a.html", b"HELLO")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        body, new_etag = cache.get(path, os.stat(path))
+        self.assertEqual(b"HELLO", body)
+        self.assertNotEqual(etag, new_etag)
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(1, cache.stats()["entries"])
+
+    def test_evicts_least_recently_used(self):
+        cache = FileCache(max_bytes=10)
+        paths = [self.write(name, b"x" * 4) for name in ("a", "b", "c")]
+        cache.get(paths[0], os.stat(paths[0]))
+        cache.get(paths[1], os.stat(paths[1]))
+        cache.get(paths[0], os.stat(paths[0]))
+        cache.get(paths[2], os.stat(paths[2]))
+        self.assertEqual([paths[0], paths[2]], list(cache.entries))
+        self.assertEqual(8, cache.size)
+        self.assertIsNone(cache.lookup(paths[1], os.stat(paths[1])))
+
+    def test_large_files_are_not_cached(self):
+        cache = FileCache(max_bytes=100, max_file_bytes=4)
+        path = self.write("big.bin", b"x" * 10)
+        body, etag = cache.get(path, os.stat(path))
+        self.assertIsNone(body)
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(0, cache.stats()["entries"])
+
+    def test_parse_range(self):
+        self.assertIsNone(parse_range(None, 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        self.assertIsNone(parse_range("bytes=0-1,4-5", 10))
+        self.assertIsNone(parse_range("bytes=a-b", 10))
+        self.assertEqual((2, 5), parse_range("bytes=2-5", 10))
+        self.assertEqual((2, 9), parse_range("bytes=2-", 10))
+        self.assertEqual((2, 9), parse_range("bytes=2-100", 10))
+        self.assertEqual((7, 9), parse_range("bytes=-3", 10))
+        self.assertEqual((0, 9), parse_range("bytes=-30", 10))
+        self.assertFalse(parse_range("bytes=10-", 10))
+        self.assertFalse(parse_range("bytes=5-2", 10))
+        self.assertFalse(parse_range("bytes=-0", 10))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a"', '"a"'))
+        self.assertTrue(etag_matches('"b", W/"a"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+        self.assertFalse(etag_matches("", '"a"'))
+
+    def test_file_response_not_modified(self):
+        cache = FileCache()
+        path = self.write("a.html", b"hello")
+        status, headers, _, _, _, _ = file_response(cache, path, {}, "text/html")
+        self.assertEqual(200, status)
+        etag = dict(headers)["ETag"]
+        status, headers, body, _, start, end = file_response(cache, path, {"If-None-Match": etag}, "text/html")
+        self.assertEqual(304, status)
+        self.assertEqual([("ETag", etag)], headers)
+        self.assertLess(end, start)
+
+    def test_file_response_ranges(self):
+        cache = FileCache()
+        path = self.write("a.bin", b"0123456789")
+        status, headers, body, _, start, end = file_response(cache, path, {"Range": "bytes=2-4"}, "text/plain")
+        self.assertEqual(206, status)
+        self.assertEqual(b"234", body[start:end + 1])
+        self.assertEqual("bytes 2-4/10", dict(headers)["Content-Range"])
+        self.assertEqual("3", dict(headers)["Content-Length"])
+        status, headers, _, _, _, _ = file_response(cache, path, {"Range": "bytes=20-"}, "text/plain")
+        self.assertEqual(416, status)
+        self.assertEqual("bytes */10", dict(headers)["Content-Range"])
+
+    def test_file_response_streams_large_files(self):
+        cache = FileCache(max_bytes=100, max_file_bytes=4)
+        path = self.write("big.0123456789.bin", b"x" * 10)
+        status, headers, body, body_path, start, end = file_response(cache, path, {}, "application/octet-stream")
+        self.assertEqual((200, None, path, 0, 9), (status, body, body_path, start, end))
+        self.assertIn("immutable", dict(headers)["Cache-Control"])
+
+
+class TestEncodings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+        for suffix in ("", ".gz", ".br"):
+            with open(self.path + suffix, "w") as f:
+                f.write(suffix or "html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def negotiate(self, accept_encoding):
+        _, _, encoding, has_variants = negotiate_encoding(self.path, os.stat(self.path), accept_encoding)
+        return encoding, has_variants
+
+    def test_accepted_encodings(self):
+        self.assertEqual({}, accepted_encodings(""))
+        self.assertEqual({"gzip": 1.0, "br": 1.0}, accepted_encodings("gzip, br"))
+        self.assertEqual({"gzip": 0.5, "br": 0.0, "*": 0.1}, accepted_encodings("GZIP;q=0.5, br;q=0, *;q=0.1"))
+        self.assertEqual({"gzip": 0.0, "identity": 1.0}, accepted_encodings("gzip;q=high, identity"))
+
+    def test_prefers_brotli(self):
+        self.assertEqual(("br", True), self.negotiate("gzip, br"))
+        self.assertEqual(("gzip", True), self.negotiate("gzip"))
+        self.assertEqual(("br", True), self.negotiate("*"))
+
+    def test_q_zero_excludes(self):
+        self.assertEqual(("gzip", True), self.negotiate("br;q=0, gzip;q=0.5"))
+        self.assertEqual(("gzip", True), self.negotiate("br;q=0, *"))
+        self.assertEqual((None, True), self.negotiate("br;q=0, gzip;q=0"))
+        self.assertEqual((None, True), self.negotiate(""))
+
+    def test_skips_stale_variants(self):
+        stat = os.stat(self.path)
+        os.utime(self.path + ".br", ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+        self.assertEqual(("gzip", True), self.negotiate("br, gzip"))
+        os.utime(self.path + ".gz", ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+        self.assertEqual((None, False), self.negotiate("br, gzip"))
+
+    def test_file_response_serves_variant(self):
+        status, headers, body, body_path, _, _ = file_response(
+            FileCache(), self.path, {"Accept-Encoding": "gzip"}, "text/html"
+        )
+        headers = dict(headers)
+        self.assertEqual((200, b".gz", self.path + ".gz"), (status, body, body_path))
+        self.assertEqual("gzip", headers["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", headers["Vary"])
+
+
+class TestAsyncServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), "w") as f:
+            f.write("<p>hi</p>")
+        self.server = AsyncServer(self.tmp.name, FileCache(), max_connections=2)
+        self.listener = await asyncio.start_server(self.server.handle, "127.0.0.1", 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+        self.streams = []
+
+    async def asyncTearDown(self):
+        for _, writer in self.streams:
+            writer.close()
+        if self.server.connections:
+            await asyncio.wait(list(self.server.connections), timeout=5)
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.tmp.cleanup()
+
+    async def connect(self):
+        stream = await asyncio.open_connection("127.0.0.1", self.port)
+        self.streams.append(stream)
+        return stream
+
+    async def get(self, stream, path="/"):
+        reader, writer = stream
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        return await read_response(reader)
+
+    async def test_keep_alive(self):
+        stream = await self.connect()
+        for _ in range(3):
+            status, headers, body = await self.get(stream)
+            self.assertEqual(200, status)
+            self.assertEqual("keep-alive", headers["Connection"])
+            self.assertEqual(b"<p>hi</p>", body)
+        stats = json.loads((await self.get(stream, "/__stats"))[2])
+        self.assertEqual(3, stats["requests"])
+        self.assertEqual(1, stats["connections"])
+        self.assertEqual({"hits": 2, "misses": 1}, {key: stats[key] for key in ("hits", "misses")})
+
+    async def test_uncached_files_are_read_off_the_loop(self):
+        calls = []
+        to_thread = asyncio.to_thread
+
+        async def counting_to_thread(func, *args):
+            calls.append(func.__name__)
+            return await to_thread(func, *args)
+
+        stream = await self.connect()
+        with patch("server.asyncio.to_thread", counting_to_thread):
+            for _ in range(2):
+                self.assertEqual(200, (await self.get(stream))[0])
+        self.assertEqual(["file_response"], calls)
+
+    async def test_truncated_body_closes_connection(self):
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        reader, writer = await self.connect()
+        writer.write(b"POST / HTTP/1.1\r\nHost: localhost\r\nContent-Length: 10\r\n\r\nabc")
+        writer.write_eof()
+        self.assertEqual(b"", await asyncio.wait_for(reader.read(), 5))
+        await asyncio.sleep(0)
+        self.assertEqual({}, self.server.connections)
+        self.assertEqual([], errors)
+
+    async def test_connection_limit(self):
+        for _ in range(2):
+            self.assertEqual(200, (await self.get(await self.connect()))[0])
+        reader, _ = await self.connect()
+        status, headers, _ = await read_response(reader)
+        self.assertEqual(503, status)
+        self.assertEqual("1", headers["Retry-After"])
+        self.assertEqual(b"", await reader.read())
+        self.assertEqual(1, self.server.rejected)
+
+    async def test_shutdown_closes_idle_connections(self):
+        reader, _ = stream = await self.connect()
+        self.assertEqual(200, (await self.get(stream))[0])
+        with redirect_stdout(StringIO()):
+            await asyncio.wait_for(self.server.shutdown(self.listener), 5)
+        self.assertEqual(b"", await reader.read())
+        self.assertEqual({}, self.server.connections)
+        with self.assertRaises(OSError):
+            await self.connect()
+
+    async def test_stats_percentiles(self):
+        self.assertEqual({"p50": None, "p90": None, "p99": None}, self.server.stats()["latency_ms"])
+        self.server.latencies.extend(i / 1000 for i in range(100, 0, -1))
+        self.assertEqual({"p50": 50.0, "p90": 90.0, "p99": 99.0}, self.server.stats()["latency_ms"])
+
+    def test_percentile(self):
+        values = list(range(1, 11))
+        self.assertEqual(5, percentile(values, 50))
+        self.assertEqual(9, percentile(values, 90))
+        self.assertEqual(10, percentile(values, 99))
+        self.assertEqual(7, percentile([7], 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from shard import (
+    check_conflicts,
+    find_conflicts,
+    load_shard_manifests,
+    merge_shards,
+    parse_shard,
+    partition_pages,
+    shard_pages,
+    write_shard_manifest,
+)
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.pages = []
+        for index in range(40):
+            path = os.path.join(self.content, f"dir{index % 4}", f"page{index}.md")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.write(path, "# Page\n\n" + "text " * (index * 200))
+            self.pages.append((path, os.path.join(self.root, "out", f"dir{index % 4}", f"page{index}.html")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_parse_shard(self):
+        self.assertEqual((2, 3), parse_shard("2/3"))
+        for text in ("0/3", "4/3", "3", "a/b", "1/0"):
+            self.assertRaises(ValueError, parse_shard, text)
+
+    def test_partition_is_deterministic_and_complete(self):
+        assignment, partition = partition_pages(self.pages, self.content, 3)
+        self.assertEqual((assignment, partition), partition_pages(list(reversed(self.pages)), self.content, 3))
+        shards = [shard_pages(self.pages, self.content, shard, 3)[0] for shard in (1, 2, 3)]
+        self.assertEqual(sorted(self.pages), sorted(page for pages in shards for page in pages))
+
+    def test_partition_balances_size(self):
+        sizes = []
+        for shard in (1, 2, 3):
+            pages, _ = shard_pages(self.pages, self.content, shard, 3)
+            sizes.append(sum(os.path.getsize(source_path) for source_path, _ in pages))
+        self.assertLess(max(sizes) - min(sizes), max(os.path.getsize(source_path) for source_path, _ in self.pages) * 2)
+
+    def test_partition_changes_with_content(self):
+        _, partition = partition_pages(self.pages, self.content, 2)
+        self.write(self.pages[0][0], "# Changed\n")
+        self.assertNotEqual(partition, partition_pages(self.pages, self.content, 2)[1])
+
+    def build_shards(self, shards):
+        shard_dir = os.path.join(self.root, "shards")
+        for shard in range(1, shards + 1):
+            output_dir = os.path.join(shard_dir, f"{shard}-of-{shards}")
+            selected, partition = shard_pages(self.pages, self.content, shard, shards)
+            pages = []
+            link_graph = {}
+            for source_path, _ in selected:
+                dest_path = os.path.join(output_dir, os.path.relpath(source_path, self.content)[:-3] + ".html")
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                self.write(dest_path, source_path)
+                pages.append((source_path, dest_path))
+                link_graph[dest_path] = {"links": ["/"], "ids": []}
+            write_shard_manifest(
+                output_dir + ".json", shard, shards, partition, "/", "hash", None, pages, output_dir, link_graph
+            )
+        return shard_dir
+
+    def test_merge(self):
+        shard_dir = self.build_shards(3)
+        docs = os.path.join(self.root, "docs")
+        link_graph = merge_shards(load_shard_manifests(shard_dir), shard_dir, docs, [])
+        self.assertEqual(40, len(link_graph))
+        with open(os.path.join(docs, "dir1", "page5.html")) as f:
+            self.assertEqual(self.pages[5][0], f.read())
+
+    def test_missing_shard(self):
+        shard_dir = self.build_shards(3)
+        os.remove(os.path.join(shard_dir, "2-of-3.json"))
+        self.assertRaises(ValueError, load_shard_manifests, shard_dir)
+
+    def test_conflicts(self):
+        shard_dir = self.build_shards(2)
+        manifests = load_shard_manifests(shard_dir)
+        page = manifests[0]["pages"][0]
+        self.assertEqual([], find_conflicts(manifests, ["index.css"]))
+        conflicts = find_conflicts(manifests, [page["output"]])
+        self.assertEqual([f"{page['output']} ({page['source']} in shard 1-of-2 and static)"], conflicts)
+        self.assertRaises(ValueError, check_conflicts, manifests, [page["output"]])
+        docs = os.path.join(self.root, "docs")
+        self.assertRaises(ValueError, merge_shards, manifests, shard_dir, docs, [page["output"]])
+        self.assertFalse(os.path.exists(docs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main><p>{{ Title }}</p>")
+        expected = "<title>Hi</title><main><b>x</b></main><p>Hi</p>"
+        actual = template.render(Title="Hi", Content="<b>x</b>")
+        self.assertEqual(expected, actual)
+
+    def test_unknown_slot_left_as_is(self):
+        template = Template("<p>{{ Footer }}</p>{{ Content }}")
+        self.assertEqual("<p>{{ Footer }}</p>body", template.render(Content="body"))
+
+    def test_basepath_in_template(self):
+        template = Template('<link href="/index.css" /><a href="https://x.com/">x</a>{{ Content }}', "/site/")
+        expected = '<link href="/site/index.css" /><a href="https://x.com/">x</a><pre>href="/raw"</pre>'
+        actual = template.render(Content='<pre>href="/raw"</pre>')
+        self.assertEqual(expected, actual)
+
+    def test_fingerprinted_assets(self):
+        assets = {"index.css": "index.0123456789.css", "images/tom.png": "images/tom.abcdef0123.png"}
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/", assets)
+        self.assertEqual('<link href="/site/index.0123456789.css" />', template.render(Content=""))
+        self.assertEqual("/site/images/tom.abcdef0123.png#top", template.rewrite_url("/images/tom.png#top"))
+        self.assertEqual("/site/blog/tom?x=1", template.rewrite_url("/blog/tom?x=1"))
+        self.assertNotEqual(Template("", "/site/").cache_key, template.cache_key)
+
+    def test_image_hints(self):
+        images = {"eager": 1, "sizes": {"images/tom.png": [928, 468]}}
+        template = Template("{{ Content }}", "/site/", images=images)
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", "", {"src": "/images/tom.png", "alt": "first"}),
+                LeafNode("img", "", {"src": "/images/missing.png", "alt": "second"}),
+            ],
+        )
+        rewriter = template.page_rewriter()
+        rewriter.rewrite_node_urls(node)
+        expected = (
+            '<p><img src="/site/images/tom.png" alt="first" width="928" height="468"></img>'
+            '<img src="/site/images/missing.png" alt="second" loading="lazy" decoding="async"></img></p>'
+        )
+        self.assertEqual(expected, node.to_html())
+        self.assertEqual(2, rewriter.images_seen)
+        self.assertIsNone(rewriter.position_key("![a](/b.png)"))
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        out = StringIO()
+        template.write(out, Title="Hi", Content=ParentNode("p", [LeafNode("b", "x")]))
+        self.assertEqual("<title>Hi</title><main><p><b>x</b></p></main>", out.getvalue())
+
+    def test_rewrite_node_urls(self):
+        template = Template("{{ Content }}", "/site/")
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "link", {"href": "/blog/tom"}),
+                LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"}),
+                LeafNode("a", "external", {"href": "https://www.boot.dev"}),
+                LeafNode("code", 'src="/raw"'),
+            ],
+        )
+        template.rewrite_node_urls(node)
+        expected = '<p><a href="/site/blog/tom">link</a><img src="/site/images/tom.png" alt="Tom"></img><a href="https://www.boot.dev">external</a><code>src="/raw"</code></p>'
+        self.assertEqual(expected, node.to_html())
+
+    def test_page_rewriter_collects_links(self):
+        template = Template('<link href="/index.css" id="style">{{ Content }}', "/site/")
+        self.assertEqual(["/site/index.css"], template.links)
+        self.assertEqual(["style"], template.ids)
+        rewriter = template.page_rewriter()
+        rewriter.rewrite_node_urls(ParentNode("p", [LeafNode("a", "x", {"href": "/blog", "id": "top"})]))
+        record = rewriter.rewrite_block(ParentNode("p", [LeafNode("img", "", {"src": "/a.png"})]))
+        self.assertEqual({"links": ["/site/a.png"], "ids": [], "images": 0}, record)
+        rewriter.replay_block({"links": ["/site/b.png"], "ids": ["b"], "images": 1})
+        self.assertEqual(1, rewriter.images_seen)
+        self.assertEqual({"links": ["/site/a.png", "/site/b.png", "/site/blog"], "ids": ["b", "top"]}, rewriter.link_graph())
+
+    def test_load_template_reuses_parsed_template(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("<p>{{ Content }}</p>")
+            template = load_template(path, "/site/")
+            self.assertIs(template, load_template(path, "/site/"))
+            self.assertIsNot(template, load_template(path, "/"))
+            with open(path, "w") as f:
+                f.write("<div>{{ Content }}</div>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual("<div>x</div>", load_template(path, "/site/").render(Content="x"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+from watch import snapshot, changed_paths
+
+
+class TestWatch(unittest.TestCase):
+    def test_changed_paths(self):
+        old_state = {"a.md": (1, 10), "b.md": (1, 10), "c.md": (1, 10)}
+        new_state = {"a.md": (1, 10), "b.md": (2, 12), "d.md": (1, 1)}
+        self.assertEqual(["b.md", "c.md", "d.md"], changed_paths(old_state, new_state))
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "content", "blog"))
+            page = os.path.join(root, "content", "blog", "post.md")
+            template = os.path.join(root, "template.html")
+            for path in (page, template):
+                with open(path, "w") as f:
+                    f.write("x")
+            state = snapshot([os.path.join(root, "content"), template])
+            self.assertEqual(sorted([page, template]), sorted(state))
+            with open(page, "w") as f:
+                f.write("longer")
+            self.assertEqual([page], changed_paths(state, snapshot([os.path.join(root, "content"), template])))
+
+
+if __name__ == "__main__":
+    unittest.main()
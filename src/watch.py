@@ -0,0 +1,35 @@
+import os
+import time
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+def changed_paths(old_state, new_state):
+    changed = {path for path, stat in new_state.items() if old_state.get(path) != stat}
+    changed.update(path for path in old_state if path not in new_state)
+    return sorted(changed)
+
+def watch(paths, on_change, interval=0.05):
+    state = snapshot(paths)
+    while True:
+        time.sleep(interval)
+        new_state = snapshot(paths)
+        changed = changed_paths(state, new_state)
+        state = new_state
+        if changed:
+            on_change(changed)